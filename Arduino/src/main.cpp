@@ -42,6 +42,10 @@ struct ServoChannel {
   int* target;
   int minAngle;
   int maxAngle;
+  // Timed moves: interpolate from startAngle to *target over moveDurationMs.
+  int startAngle;
+  unsigned long moveStartMillis;
+  unsigned long moveDurationMs;
 };
 
 ServoChannel channels[] = {
@@ -56,9 +60,20 @@ ServoChannel channels[] = {
 const size_t SERVO_COUNT = sizeof(channels) / sizeof(channels[0]);
 const int SERVO_STEP_DEGREES = 1;
 const unsigned long SERVO_STEP_INTERVAL_MS = 15;
+const unsigned int SERIAL_LINE_LIMIT = 64;
+const unsigned long MAX_MOVE_DURATION_MS = 60000;
+const unsigned long MIN_TELEMETRY_INTERVAL_MS = 20;
+const unsigned long MAX_TELEMETRY_INTERVAL_MS = 60000;
+// "@<millis>,<moving mask>,<p1>,...,<p6>" is at most 38 characters plus CRLF.
+const unsigned int TELEMETRY_LINE_BYTES = 40;
 
 String serialLineBuffer;
+bool discardingSerialLine = false;
+unsigned long pendingMoveDurationMs = 0;
+uint8_t touchedChannels = 0;
 unsigned long lastServoStepMillis = 0;
+unsigned long telemetryIntervalMs = 0;
+unsigned long lastTelemetryMillis = 0;
 
 void initializePose();
 void handleSerialLine(const String& line);
@@ -66,7 +81,9 @@ void handleToken(const String& token);
 int servoIndexFromId(const String& id);
 bool isNumeric(const String& value);
 void setServoTarget(int index, int angle);
+void startTimedMove(unsigned long durationMs);
 void stepServosTowardTargets();
+void sendTelemetry();
 
 void setup() {
   Serial.begin(115200);
@@ -87,8 +104,9 @@ void setup() {
   wrist_ver.attach(5);
   gripper.attach(3);
 
+  serialLineBuffer.reserve(SERIAL_LINE_LIMIT + 1);
   initializePose();
-  Serial.println(F("Braccio ready. Send commands like m1:135 or m1:90;m2:45"));
+  Serial.println(F("Braccio ready. Send commands like m1:135, m1:90;m2:45;t:800 or tel:50"));
 }
 
 void loop() {
@@ -100,17 +118,27 @@ void loop() {
     }
 
     if (incoming == '\n') {
-      handleSerialLine(serialLineBuffer);
+      // Every newline-terminated frame is acknowledged so the host can
+      // return the credit it spent on it.
+      if (discardingSerialLine) {
+        discardingSerialLine = false;
+        Serial.println(F("err"));
+      } else {
+        handleSerialLine(serialLineBuffer);
+        Serial.println(F("ok"));
+      }
       serialLineBuffer = "";
-    } else {
+    } else if (!discardingSerialLine) {
       serialLineBuffer += incoming;
-      if (serialLineBuffer.length() > 64) {
+      if (serialLineBuffer.length() > SERIAL_LINE_LIMIT) {
         serialLineBuffer = "";  // drop malformed line to keep memory safe
+        discardingSerialLine = true;
       }
     }
   }
 
   stepServosTowardTargets();
+  sendTelemetry();
 }
 
 void initializePose() {
@@ -127,6 +155,8 @@ void handleSerialLine(const String& line) {
     return;
   }
 
+  pendingMoveDurationMs = 0;
+  touchedChannels = 0;
   int start = 0;
   while (start < line.length()) {
     int end = line.indexOf(';', start);
@@ -140,6 +170,12 @@ void handleSerialLine(const String& line) {
 
     start = end + 1;
   }
+
+  // A t:<ms> token anywhere in the line makes every servo it touched
+  // arrive together after that many milliseconds.
+  if (pendingMoveDurationMs > 0) {
+    startTimedMove(pendingMoveDurationMs);
+  }
 }
 
 void handleToken(const String& token) {
@@ -162,6 +198,19 @@ void handleToken(const String& token) {
     return;
   }
 
+  if (id == "t") {
+    pendingMoveDurationMs = min((unsigned long)value.toInt(), MAX_MOVE_DURATION_MS);
+    return;
+  }
+
+  // tel:<ms> streams positions every <ms> milliseconds; tel:0 stops it.
+  if (id == "tel") {
+    unsigned long interval = (unsigned long)value.toInt();
+    telemetryIntervalMs = interval == 0 ? 0 : constrain(interval, MIN_TELEMETRY_INTERVAL_MS, MAX_TELEMETRY_INTERVAL_MS);
+    lastTelemetryMillis = millis() - telemetryIntervalMs;
+    return;
+  }
+
   int index = servoIndexFromId(id);
   if (index < 0) {
     return;
@@ -207,6 +256,21 @@ void setServoTarget(int index, int angle) {
   ServoChannel& channel = channels[index];
   int clamped = constrain(angle, channel.minAngle, channel.maxAngle);
   *channel.target = clamped;
+  channel.moveDurationMs = 0;
+  touchedChannels |= (1 << index);
+}
+
+void startTimedMove(unsigned long durationMs) {
+  unsigned long now = millis();
+  for (size_t i = 0; i < SERVO_COUNT; ++i) {
+    if (!(touchedChannels & (1 << i))) {
+      continue;
+    }
+    ServoChannel& channel = channels[i];
+    channel.startAngle = *channel.position;
+    channel.moveStartMillis = now;
+    channel.moveDurationMs = durationMs;
+  }
 }
 
 void stepServosTowardTargets() {
@@ -218,6 +282,22 @@ void stepServosTowardTargets() {
   lastServoStepMillis = now;
   for (size_t i = 0; i < SERVO_COUNT; ++i) {
     ServoChannel& channel = channels[i];
+    if (channel.moveDurationMs > 0) {
+      unsigned long elapsed = now - channel.moveStartMillis;
+      int next = *channel.target;
+      if (elapsed < channel.moveDurationMs) {
+        long span = (long)*channel.target - channel.startAngle;
+        next = channel.startAngle + (int)(span * (long)elapsed / (long)channel.moveDurationMs);
+      } else {
+        channel.moveDurationMs = 0;
+      }
+      if (next != *channel.position) {
+        *channel.position = next;
+        channel.servo->write(next);
+      }
+      continue;
+    }
+
     int diff = *channel.target - *channel.position;
     if (diff == 0) {
       continue;
@@ -236,3 +316,35 @@ void stepServosTowardTargets() {
     channel.servo->write(*channel.position);
   }
 }
+
+void sendTelemetry() {
+  if (telemetryIntervalMs == 0) {
+    return;
+  }
+  unsigned long now = millis();
+  if (now - lastTelemetryMillis < telemetryIntervalMs) {
+    return;
+  }
+  // Skip a sample rather than block the servo loop on a full TX buffer.
+  if (Serial.availableForWrite() < (int)TELEMETRY_LINE_BYTES) {
+    return;
+  }
+
+  lastTelemetryMillis = now;
+  uint8_t moving = 0;
+  for (size_t i = 0; i < SERVO_COUNT; ++i) {
+    if (*channels[i].position != *channels[i].target || channels[i].moveDurationMs > 0) {
+      moving |= (1 << i);
+    }
+  }
+
+  Serial.print('@');
+  Serial.print(now);
+  Serial.print(',');
+  Serial.print(moving);
+  for (size_t i = 0; i < SERVO_COUNT; ++i) {
+    Serial.print(',');
+    Serial.print(*channels[i].position);
+  }
+  Serial.println();
+}
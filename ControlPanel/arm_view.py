@@ -1,15 +1,21 @@
 from __future__ import annotations
 
 import math
+from typing import Mapping
 
 from PyQt6 import QtCore, QtGui, QtWidgets
 
-from config import ARM_LINKS_MM, SERVO_CONFIG, clamp
+from config import BASE_YAW_OFFSET_DEG, SERVO_CONFIG, clamp
 from kinematics import ArmKinematics
+from pose import Pose, servo_mask
+from profiler import PROFILER
+
+_DRAWN_SERVOS = ("m1", "m2", "m3", "m4", "m5")
+_DRAWN_MASK = servo_mask(_DRAWN_SERVOS)
 
 
 class ArmView(QtWidgets.QWidget):
-    pose_changed = QtCore.pyqtSignal(dict)
+    pose_changed = QtCore.pyqtSignal(object)
 
     def __init__(self, parent: QtWidgets.QWidget | None = None):
         super().__init__(parent)
@@ -18,35 +24,49 @@ class ArmView(QtWidgets.QWidget):
             QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Expanding)
         )
         self.setCursor(QtCore.Qt.CursorShape.CrossCursor)
-        self._servo_values: dict[str, int] = {
-            "m1": SERVO_CONFIG["m1"].initial,
-            "m2": SERVO_CONFIG["m2"].initial,
-            "m3": SERVO_CONFIG["m3"].initial,
-            "m4": SERVO_CONFIG["m4"].initial,
-            "m5": SERVO_CONFIG["m5"].initial,
-        }
+        self._servo_values = Pose.from_slots(_DRAWN_SERVOS, (SERVO_CONFIG[sid].initial for sid in _DRAWN_SERVOS))
         self._drag_target: tuple[float, float] | None = None
         self._is_dragging = False
         self._active_joint: str | None = None
         self._last_drag_valid = True
         self._last_drag_point: QtCore.QPointF | None = None
         self._display_rotation = math.pi / 2  # rotate visualization so 90° aims upward
+        self._show_profiler_overlay = False
+        self._actual_values: Pose | None = None
 
     def set_servo_value(self, servo_id: str, value: int) -> None:
         if servo_id in self._servo_values:
             self._servo_values[servo_id] = value
             self.update()
 
-    def set_pose(self, pose: dict[str, int]) -> None:
-        changed = False
-        for key in ("m1", "m2", "m3", "m4", "m5"):
-            if key in pose:
-                if self._servo_values.get(key) != pose[key]:
-                    changed = True
-                self._servo_values[key] = pose[key]
-        if changed:
+    def set_pose(self, pose: Mapping[str, int]) -> None:
+        if not isinstance(pose, Pose):
+            pose = Pose(pose)
+        if self._servo_values.update(pose.select(_DRAWN_MASK)):
+            self.update()
+
+    def set_actual_pose(self, pose: Mapping[str, int] | None) -> None:
+        """Overlay the pose the arm reports (telemetry); ``None`` hides it."""
+        if pose is None:
+            if self._actual_values is not None:
+                self._actual_values = None
+                self.update()
+            return
+        if not isinstance(pose, Pose):
+            pose = Pose(pose)
+        drawn = pose.select(_DRAWN_MASK)
+        if self._actual_values is None:
+            self._actual_values = self._servo_values.copy()
+            self._actual_values.update(drawn)
+            self.update()
+        elif self._actual_values.update(drawn):
             self.update()
 
+    def set_profiler_overlay(self, visible: bool) -> None:
+        self._show_profiler_overlay = visible
+        self.update()
+
+    @PROFILER.timed("paint")
     def paintEvent(self, event: QtGui.QPaintEvent) -> None:  # noqa: N802 - Qt override
         painter = QtGui.QPainter(self)
         painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
@@ -54,7 +74,11 @@ class ArmView(QtWidgets.QWidget):
 
         origin, scale = self._origin_and_scale()
         self._draw_workspace(painter, origin, scale)
+        if self._actual_values is not None:
+            self._draw_actual_arm(painter, origin, scale)
         self._draw_arm(painter, origin, scale)
+        if self._show_profiler_overlay:
+            self._draw_profiler_overlay(painter)
 
     def mousePressEvent(self, event: QtGui.QMouseEvent) -> None:  # noqa: N802
         if event.button() == QtCore.Qt.MouseButton.LeftButton:
@@ -94,9 +118,9 @@ class ArmView(QtWidgets.QWidget):
         return origin, scale
 
     def _draw_workspace(self, painter: QtGui.QPainter, origin: QtCore.QPointF, scale: float) -> None:
-        shoulder_len = ARM_LINKS_MM["shoulder"]
-        elbow_len = ARM_LINKS_MM["elbow"]
-        wrist_len = ARM_LINKS_MM["wrist"]
+        shoulder_len = ArmKinematics.links["shoulder"]
+        elbow_len = ArmKinematics.links["elbow"]
+        wrist_len = ArmKinematics.links["wrist"]
 
         painter.save()
         painter.setPen(QtCore.Qt.PenStyle.NoPen)
@@ -145,7 +169,7 @@ class ArmView(QtWidgets.QWidget):
         painter.drawRoundedRect(base_rect, 6, 6)
 
         painter.setPen(QtGui.QPen(QtGui.QColor(120, 180, 255), 2))
-        base_angle = math.radians(self._servo_values["m1"] - 135)
+        base_angle = math.radians(self._servo_values["m1"] - BASE_YAW_OFFSET_DEG)
         line = QtCore.QLineF(
             origin,
             QtCore.QPointF(
@@ -184,12 +208,45 @@ class ArmView(QtWidgets.QWidget):
         painter.setBrush(QtGui.QColor(255, 196, 120, 200))
         painter.drawEllipse(wrist_handle, 7, 7)
 
-    def _arm_screen_points(self, origin: QtCore.QPointF, scale: float) -> list[QtCore.QPointF]:
-        points = ArmKinematics.forward(
-            self._servo_values["m2"],
-            self._servo_values["m3"],
-            self._servo_values["m5"],
+    def _draw_actual_arm(self, painter: QtGui.QPainter, origin: QtCore.QPointF, scale: float) -> None:
+        assert self._actual_values is not None
+        color = QtGui.QColor(150, 230, 160, 150)
+        painter.save()
+        painter.setPen(QtGui.QPen(color, 2))
+        base_angle = math.radians(self._actual_values["m1"] - BASE_YAW_OFFSET_DEG)
+        painter.drawLine(
+            QtCore.QLineF(
+                origin,
+                QtCore.QPointF(origin.x() + 55 * math.cos(base_angle), origin.y() - 55 * math.sin(base_angle)),
+            )
         )
+        screen_points = self._arm_screen_points(origin, scale, self._actual_values)
+        painter.setPen(QtGui.QPen(color, 10, QtCore.Qt.PenStyle.SolidLine, QtCore.Qt.PenCapStyle.RoundCap))
+        for start, end in zip(screen_points[:-1], screen_points[1:]):
+            painter.drawLine(QtCore.QLineF(start, end))
+        painter.restore()
+
+    def _draw_profiler_overlay(self, painter: QtGui.QPainter) -> None:
+        lines = PROFILER.summary_lines() or ["profiler: waiting for samples..."]
+        painter.save()
+        painter.setFont(QtGui.QFont("Consolas", 9))
+        metrics = painter.fontMetrics()
+        line_height = metrics.height()
+        width = max(metrics.horizontalAdvance(line) for line in lines) + 16
+        rect = QtCore.QRectF(8, 8, width, line_height * len(lines) + 12)
+        painter.setPen(QtCore.Qt.PenStyle.NoPen)
+        painter.setBrush(QtGui.QColor(0, 0, 0, 150))
+        painter.drawRoundedRect(rect, 4, 4)
+        painter.setPen(QtGui.QColor(170, 230, 170))
+        for index, line in enumerate(lines):
+            painter.drawText(QtCore.QPointF(16, 14 + metrics.ascent() + index * line_height), line)
+        painter.restore()
+
+    def _arm_screen_points(
+        self, origin: QtCore.QPointF, scale: float, values: Pose | None = None
+    ) -> list[QtCore.QPointF]:
+        values = self._servo_values if values is None else values
+        points = ArmKinematics.forward(values["m2"], values["m3"], values["m5"])
         rotated_points = [self._rotate_point(pt, self._display_rotation) for pt in points]
         return [self._to_screen(pt, origin, scale) for pt in rotated_points]
 
@@ -199,9 +256,9 @@ class ArmView(QtWidgets.QWidget):
         return self._rotate_point((x_disp, z_disp), -self._display_rotation)
 
     def _current_tool_angle(self) -> float:
-        shoulder_angle = math.radians(self._servo_values["m2"] - 90)
-        elbow_deflection = math.radians(self._servo_values["m3"] - 90)
-        wrist_deflection = math.radians(self._servo_values["m5"] - 90)
+        shoulder_angle = math.radians(self._servo_values["m2"] - ArmKinematics.offsets["m2"])
+        elbow_deflection = math.radians(self._servo_values["m3"] - ArmKinematics.offsets["m3"])
+        wrist_deflection = math.radians(self._servo_values["m5"] - ArmKinematics.offsets["m5"])
         return shoulder_angle + elbow_deflection + wrist_deflection
 
     def _wrist_handle_point(self, origin: QtCore.QPointF, scale: float) -> QtCore.QPointF:
@@ -211,7 +268,7 @@ class ArmView(QtWidgets.QWidget):
             self._servo_values["m5"],
         )
         effector = points[-1]
-        handle_length = ARM_LINKS_MM["wrist"] * 0.5
+        handle_length = ArmKinematics.links["wrist"] * 0.5
         angle = self._current_tool_angle()
         handle_point = (
             effector[0] + handle_length * math.cos(angle),
@@ -274,13 +331,14 @@ class ArmView(QtWidgets.QWidget):
                 best = dist
         return closest
 
+    @PROFILER.timed("drag")
     def _handle_drag(self, pos: QtCore.QPointF) -> None:
         if self._active_joint is None:
             self._active_joint = "effector"
 
         origin, scale = self._origin_and_scale()
         self._last_drag_point = QtCore.QPointF(pos)
-        solution: dict[str, int] | None = None
+        solution: Pose | None = None
         within_limits = True
 
         if self._active_joint == "base":
@@ -289,9 +347,9 @@ class ArmView(QtWidgets.QWidget):
             if math.isclose(dx, 0.0, abs_tol=1e-4) and math.isclose(dy, 0.0, abs_tol=1e-4):
                 return
             angle = math.degrees(math.atan2(dy, dx))
-            m1_value = int(round(angle + 135))
+            m1_value = int(round(angle + BASE_YAW_OFFSET_DEG))
             m1_value = int(clamp(m1_value, SERVO_CONFIG["m1"].minimum, SERVO_CONFIG["m1"].maximum))
-            solution = {"m1": m1_value}
+            solution = Pose.from_slots(("m1",), (m1_value,))
         else:
             x, z = self._screen_to_plane(pos, origin, scale)
             if self._active_joint == "shoulder":
@@ -300,7 +358,7 @@ class ArmView(QtWidgets.QWidget):
                     return
                 solution, within_limits = result
             elif self._active_joint == "elbow":
-                result = ArmKinematics.solve_elbow(x, z)
+                result = ArmKinematics.solve_elbow(x, z, current=self._servo_values)
                 if result is None:
                     return
                 solution, within_limits = result
@@ -312,7 +370,7 @@ class ArmView(QtWidgets.QWidget):
                 within_limits = True
             else:  # effector
                 tool_angle = self._current_tool_angle()
-                result = ArmKinematics.solve_inverse(x, z, tool_angle)
+                result = ArmKinematics.solve_inverse(x, z, tool_angle, current=self._servo_values)
                 if result is None:
                     return
                 solution, within_limits = result
@@ -338,7 +396,7 @@ class ArmView(QtWidgets.QWidget):
         x, y = point
         return (x * cos_a - y * sin_a, x * sin_a + y * cos_a)
 
-    def _solve_wrist_rotation(self, target_x: float, target_z: float) -> dict[str, int] | None:
+    def _solve_wrist_rotation(self, target_x: float, target_z: float) -> Pose | None:
         points = ArmKinematics.forward(
             self._servo_values["m2"],
             self._servo_values["m3"],
@@ -351,12 +409,12 @@ class ArmView(QtWidgets.QWidget):
             return None
         phi_target = math.atan2(vec_z, vec_x)
 
-        shoulder_angle = math.radians(self._servo_values["m2"] - 90)
-        elbow_deflection = math.radians(self._servo_values["m3"] - 90)
+        shoulder_angle = math.radians(self._servo_values["m2"] - ArmKinematics.offsets["m2"])
+        elbow_deflection = math.radians(self._servo_values["m3"] - ArmKinematics.offsets["m3"])
         forearm_angle = shoulder_angle + elbow_deflection
         wrist_relative = phi_target - forearm_angle
 
-        m5_value = int(round(math.degrees(wrist_relative) + 90))
+        m5_value = int(round(math.degrees(wrist_relative) + ArmKinematics.offsets["m5"]))
         if not (SERVO_CONFIG["m5"].minimum <= m5_value <= SERVO_CONFIG["m5"].maximum):
             return None
-        return {"m5": int(clamp(m5_value, SERVO_CONFIG["m5"].minimum, SERVO_CONFIG["m5"].maximum))}
+        return Pose.from_slots(("m5",), (int(clamp(m5_value, SERVO_CONFIG["m5"].minimum, SERVO_CONFIG["m5"].maximum)),))
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from config import ARM_LINKS_MM, CALIBRATION_PROFILE, JOINT_ZERO_OFFSETS_DEG
+
+LINK_NAMES = ("shoulder", "elbow", "wrist")
+JOINT_IDS = ("m2", "m3", "m5")
+SAMPLE_COLUMNS = (*JOINT_IDS, "x", "z")
+
+
+@dataclass(frozen=True)
+class CalibrationFit:
+    links_mm: dict[str, float]
+    offsets_deg: dict[str, float]
+    rms_mm: float
+    max_mm: float
+    iterations: int
+    samples: int
+
+
+def load_samples(path: str | Path) -> np.ndarray:
+    """Read a CSV with ``m2,m3,m5,x,z`` columns (commanded angles, measured effector in mm)."""
+    data = np.genfromtxt(path, delimiter=",", names=True, dtype=float, encoding="utf-8")
+    missing = [column for column in SAMPLE_COLUMNS if column not in (data.dtype.names or ())]
+    if missing:
+        raise ValueError(f"Sample file is missing column(s): {', '.join(missing)}")
+    samples = np.column_stack([np.atleast_1d(data[column]) for column in SAMPLE_COLUMNS])
+    return samples[~np.isnan(samples).any(axis=1)]
+
+
+def forward_batch(params: np.ndarray, angles: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorised ``ArmKinematics.forward`` effector for ``params = [L1, L2, L3, o2, o3, o5]``."""
+    radians = np.radians(angles - params[3:])
+    a1 = radians[:, 0]
+    a12 = a1 + radians[:, 1]
+    a123 = a12 + radians[:, 2]
+    x = params[0] * np.cos(a1) + params[1] * np.cos(a12) + params[2] * np.cos(a123)
+    z = params[0] * np.sin(a1) + params[1] * np.sin(a12) + params[2] * np.sin(a123)
+    return x, z
+
+
+def _residuals_and_jacobian(params: np.ndarray, angles: np.ndarray, measured: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    radians = np.radians(angles - params[3:])
+    a1 = radians[:, 0]
+    a12 = a1 + radians[:, 1]
+    a123 = a12 + radians[:, 2]
+    c1, c12, c123 = np.cos(a1), np.cos(a12), np.cos(a123)
+    s1, s12, s123 = np.sin(a1), np.sin(a12), np.sin(a123)
+    l1, l2, l3 = params[:3]
+
+    x = l1 * c1 + l2 * c12 + l3 * c123
+    z = l1 * s1 + l2 * s12 + l3 * s123
+    residuals = np.concatenate([x - measured[:, 0], z - measured[:, 1]])
+
+    # Raising an offset turns every joint after it the other way, hence the signs.
+    deg = np.pi / 180.0
+    jac_x = np.column_stack([c1, c12, c123, z * deg, (l2 * s12 + l3 * s123) * deg, l3 * s123 * deg])
+    jac_z = np.column_stack(
+        [s1, s12, s123, -x * deg, -(l2 * c12 + l3 * c123) * deg, -l3 * c123 * deg]
+    )
+    return residuals, np.vstack([jac_x, jac_z])
+
+
+def fit_calibration(samples: np.ndarray, max_iterations: int = 100, tolerance: float = 1e-9) -> CalibrationFit:
+    """Least-squares fit of link lengths and zero offsets with Levenberg-Marquardt."""
+    samples = np.asarray(samples, dtype=float)
+    if samples.ndim != 2 or samples.shape[1] != len(SAMPLE_COLUMNS):
+        raise ValueError(f"Samples must be an (N, {len(SAMPLE_COLUMNS)}) array of {', '.join(SAMPLE_COLUMNS)}.")
+    if len(samples) < 6:
+        raise ValueError("At least 6 samples are needed to fit 6 parameters.")
+    angles = samples[:, :3]
+    measured = samples[:, 3:]
+
+    params = np.array(
+        [ARM_LINKS_MM[name] for name in LINK_NAMES] + [JOINT_ZERO_OFFSETS_DEG[sid] for sid in JOINT_IDS]
+    )
+    residuals, jacobian = _residuals_and_jacobian(params, angles, measured)
+    cost = residuals @ residuals
+    damping = 1e-3
+    iteration = 0
+    for iteration in range(1, max_iterations + 1):
+        normal = jacobian.T @ jacobian
+        gradient = jacobian.T @ residuals
+        step = np.linalg.solve(normal + damping * np.diag(np.diag(normal)), -gradient)
+        candidate = params + step
+        trial_residuals, trial_jacobian = _residuals_and_jacobian(candidate, angles, measured)
+        trial_cost = trial_residuals @ trial_residuals
+        if trial_cost < cost:
+            converged = cost - trial_cost <= tolerance * max(cost, 1.0)
+            params, residuals, jacobian, cost = candidate, trial_residuals, trial_jacobian, trial_cost
+            damping = max(damping / 10.0, 1e-12)
+            if converged:
+                break
+        else:
+            damping *= 10.0
+            if damping > 1e12:
+                break
+
+    errors = np.hypot(residuals[: len(samples)], residuals[len(samples) :])
+    return CalibrationFit(
+        links_mm={name: float(value) for name, value in zip(LINK_NAMES, params[:3])},
+        offsets_deg={sid: float(value) for sid, value in zip(JOINT_IDS, params[3:])},
+        rms_mm=float(np.sqrt(np.mean(errors**2))),
+        max_mm=float(errors.max()),
+        iterations=iteration,
+        samples=len(samples),
+    )
+
+
+def write_profile(fit: CalibrationFit, path: str | Path = CALIBRATION_PROFILE) -> None:
+    """Store the fit in the calibration profile, keeping any other sections already there."""
+    path = Path(path)
+    profile = json.loads(path.read_text(encoding="utf-8")) if path.is_file() else {}
+    profile["links_mm"] = {name: round(value, 3) for name, value in fit.links_mm.items()}
+    profile["offsets_deg"] = {sid: round(value, 3) for sid, value in fit.offsets_deg.items()}
+    profile["fit"] = {"rms_mm": round(fit.rms_mm, 3), "max_mm": round(fit.max_mm, 3), "samples": fit.samples}
+    path.write_text(json.dumps(profile, indent=2) + "\n", encoding="utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fit Braccio link lengths and servo zero offsets.")
+    parser.add_argument("samples", help="CSV with m2,m3,m5,x,z columns")
+    parser.add_argument("-o", "--output", default=str(CALIBRATION_PROFILE), help="calibration profile to write")
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    start = time.perf_counter()
+    fit = fit_calibration(samples)
+    elapsed = time.perf_counter() - start
+    write_profile(fit, args.output)
+
+    print(f"Fitted {fit.samples} samples in {elapsed * 1000:.1f} ms ({fit.iterations} iterations)")
+    for name, value in fit.links_mm.items():
+        print(f"  {name:>8}: {value:8.2f} mm")
+    for servo_id, value in fit.offsets_deg.items():
+        print(f"  {servo_id:>8}: {value:8.2f} deg")
+    print(f"  residual: {fit.rms_mm:.2f} mm rms, {fit.max_mm:.2f} mm max -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,35 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from pathlib import Path
 
 DEFAULT_PORT = "COM3"
 BAUD_RATE = 115200
 SLIDER_DEBOUNCE_MS = 150
 
+# Mirror of the firmware slew rate in stepServosTowardTargets().
+SERVO_STEP_DEGREES = 1
+SERVO_STEP_INTERVAL_MS = 15
+
+# Must match SERIAL_LINE_LIMIT in the firmware; longer lines are dropped.
+SERIAL_LINE_LIMIT = 64
+# Usable RX buffer on the AVR boards: the 64-byte HardwareSerial ring keeps
+# one slot free, so in-flight bytes must fit inside 63.
+SERIAL_RX_BUFFER_BYTES = 63
+FLOW_CONTROL_MAX_FRAMES = 4
+FLOW_CONTROL_ACK_TIMEOUT_MS = 500
+
+PROFILER_OVERLAY_REFRESH_MS = 1000
+
+TELEMETRY_INTERVAL_MS = 50
+TELEMETRY_BUFFER_SAMPLES = 4096
+TELEMETRY_OVERLAY_REFRESH_MS = 33
+
+POSE_BUS_NAME = "braccio_pose_bus"
+POSE_BUS_CAPACITY = 256
+POSE_BUS_POLL_MS = 5
+PROFILE_OUTPUT_DIR = Path(__file__).with_name("profiles")
+
 
 @dataclass(frozen=True)
 class ServoConfig:
@@ -24,12 +48,37 @@ SERVO_CONFIG: dict[str, ServoConfig] = {
     "m6": ServoConfig("Gripper", 10, 110, 73),
 }
 
+# Relative cost of moving each servo by one degree when choosing between IK
+# branches. The firmware slews every channel at the same rate, so these only
+# need changing to spare a particular joint.
+JOINT_TRAVEL_WEIGHTS: dict[str, float] = {
+    "m1": 1.0,
+    "m2": 1.0,
+    "m3": 1.0,
+    "m4": 1.0,
+    "m5": 1.0,
+    "m6": 1.0,
+}
+
 ARM_LINKS_MM = {
     "shoulder": 95.0,
     "elbow": 110.0,
     "wrist": 80.0,
 }
 
+# m1 reading when the arm faces along the +x axis of the 3D frame.
+BASE_YAW_OFFSET_DEG = 135
+
+# Servo reading at which each planar joint is straight (nominal values).
+JOINT_ZERO_OFFSETS_DEG = {
+    "m2": 90.0,
+    "m3": 90.0,
+    "m5": 90.0,
+}
+
+# Per-arm profile written by calibration.py; BRACCIO_CALIBRATION overrides it.
+CALIBRATION_PROFILE = Path(__file__).with_name("calibration.json")
+
 
 def clamp(value: float, minimum: float, maximum: float) -> float:
     return max(minimum, min(maximum, value))
@@ -1,45 +1,280 @@
 from __future__ import annotations
 
+import json
 import math
+import os
+from pathlib import Path
+from typing import Mapping
 
-from config import ARM_LINKS_MM, SERVO_CONFIG, clamp
+from config import (
+    ARM_LINKS_MM,
+    BASE_YAW_OFFSET_DEG,
+    CALIBRATION_PROFILE,
+    JOINT_TRAVEL_WEIGHTS,
+    JOINT_ZERO_OFFSETS_DEG,
+    SERVO_CONFIG,
+    clamp,
+)
+from pose import Pose
+from profiler import PROFILER
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore
+
+_ELBOW_CHAIN = ("m2", "m3")
+_WRIST_CHAIN = ("m2", "m3", "m5")
+_CARTESIAN_CHAIN = ("m1", "m2", "m3", "m5")
 
 
 class ArmKinematics:
-    """Planar 3-link model used for visualization and dragging."""
+    """Planar 3-link model used for visualization and dragging.
+
+    ``links`` and ``offsets`` start at the nominal values from ``config`` and
+    are replaced by the per-arm calibration profile when one is present.
+    """
+
+    links: dict[str, float] = dict(ARM_LINKS_MM)
+    offsets: dict[str, float] = dict(JOINT_ZERO_OFFSETS_DEG)
+    # Why the profile was ignored at import, for the panel to report.
+    calibration_error: str | None = None
+
+    @classmethod
+    def load_calibration(cls, path: str | os.PathLike | None = None) -> bool:
+        """Apply ``links_mm``/``offsets_deg`` from a calibration profile; returns False if it is missing.
+
+        Raises ``ValueError`` for a malformed profile and leaves the model unchanged.
+        """
+        profile = Path(path or os.environ.get("BRACCIO_CALIBRATION", CALIBRATION_PROFILE))
+        if not profile.is_file():
+            return False
+        data = json.loads(profile.read_text(encoding="utf-8"))
+        if not isinstance(data, dict):
+            raise ValueError(f"{profile} does not hold a calibration object.")
+        links = cls._profile_section(data, "links_mm", ARM_LINKS_MM)
+        offsets = cls._profile_section(data, "offsets_deg", JOINT_ZERO_OFFSETS_DEG)
+        for name, value in links.items():
+            if value <= 0:
+                raise ValueError(f"Link length '{name}' must be positive, got {value}.")
+        cls.links = {**ARM_LINKS_MM, **links}
+        cls.offsets = {**JOINT_ZERO_OFFSETS_DEG, **offsets}
+        return True
+
+    @classmethod
+    def reset_calibration(cls) -> None:
+        cls.links = dict(ARM_LINKS_MM)
+        cls.offsets = dict(JOINT_ZERO_OFFSETS_DEG)
+
+    @staticmethod
+    def _profile_section(data: dict, section: str, known: Mapping[str, float]) -> dict[str, float]:
+        entries = data.get(section, {})
+        if not isinstance(entries, dict):
+            raise ValueError(f"Calibration section '{section}' must be an object.")
+        values = {}
+        for name, value in entries.items():
+            if name not in known:
+                continue
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Calibration value {section}.{name} is not a number: {value!r}") from None
+            if not math.isfinite(number):
+                raise ValueError(f"Calibration value {section}.{name} is not finite.")
+            values[name] = number
+        return values
 
     @classmethod
     def max_reach(cls) -> float:
-        return ARM_LINKS_MM["shoulder"] + ARM_LINKS_MM["elbow"] + ARM_LINKS_MM["wrist"]
+        return cls.links["shoulder"] + cls.links["elbow"] + cls.links["wrist"]
 
     @classmethod
     def forward(cls, m2: int, m3: int, m5: int) -> list[tuple[float, float]]:
         base = (0.0, 0.0)
-        shoulder_angle = math.radians(m2 - 90)
-        elbow_deflection = math.radians(m3 - 90)
+        shoulder_angle = math.radians(m2 - cls.offsets["m2"])
+        elbow_deflection = math.radians(m3 - cls.offsets["m3"])
         forearm_angle = shoulder_angle + elbow_deflection
-        wrist_deflection = math.radians(m5 - 90)
+        wrist_deflection = math.radians(m5 - cls.offsets["m5"])
         end_angle = forearm_angle + wrist_deflection
 
         p1 = (
-            ARM_LINKS_MM["shoulder"] * math.cos(shoulder_angle),
-            ARM_LINKS_MM["shoulder"] * math.sin(shoulder_angle),
+            cls.links["shoulder"] * math.cos(shoulder_angle),
+            cls.links["shoulder"] * math.sin(shoulder_angle),
         )
         p2 = (
-            p1[0] + ARM_LINKS_MM["elbow"] * math.cos(forearm_angle),
-            p1[1] + ARM_LINKS_MM["elbow"] * math.sin(forearm_angle),
+            p1[0] + cls.links["elbow"] * math.cos(forearm_angle),
+            p1[1] + cls.links["elbow"] * math.sin(forearm_angle),
         )
         p3 = (
-            p2[0] + ARM_LINKS_MM["wrist"] * math.cos(end_angle),
-            p2[1] + ARM_LINKS_MM["wrist"] * math.sin(end_angle),
+            p2[0] + cls.links["wrist"] * math.cos(end_angle),
+            p2[1] + cls.links["wrist"] * math.sin(end_angle),
         )
         return [base, p1, p2, p3]
 
     @classmethod
-    def solve_inverse(cls, x: float, z: float, phi: float = -math.pi / 2) -> tuple[dict[str, int], bool] | None:
+    @PROFILER.timed("ik.inverse")
+    def solve_inverse(
+        cls,
+        x: float,
+        z: float,
+        phi: float = -math.pi / 2,
+        current: Mapping[str, int] | None = None,
+    ) -> tuple[Pose, bool] | None:
+        result = cls._wrist_chain_candidates(x, z, phi)
+        if result is None:
+            return None
+        candidates, within_limits = result
+        return Pose.from_slots(_WRIST_CHAIN, cls._closest(_WRIST_CHAIN, candidates, current)), within_limits
+
+    @classmethod
+    @PROFILER.timed("ik.cartesian")
+    def solve_cartesian(
+        cls,
+        x: float,
+        y: float,
+        z: float,
+        pitch: float = 0.0,
+        current: Mapping[str, int] | None = None,
+    ) -> tuple[Pose, bool] | None:
+        """Solve a 3D target for m1/m2/m3/m5.
+
+        The frame is centred on the shoulder pivot with ``z`` up; the base yaw
+        is ``m1 - BASE_YAW_OFFSET_DEG`` degrees from the ``x`` axis. ``pitch``
+        is the tool angle above the horizontal in radians. Both the facing and
+        the reaching-over-the-top base yaw are tried, and among reachable
+        solutions the one with the least joint travel from ``current`` wins.
+        """
+        reach = math.hypot(x, y)
+        if reach < 1e-6:
+            yaw = cls._current_yaw(current)
+        else:
+            yaw = math.degrees(math.atan2(y, x))
+
+        # The planar chain works in (height, -reach); reaching over the top
+        # mirrors the reach and turns the base half a turn.
+        candidates: list[tuple[int, ...]] = []
+        within_limits = False
+        for sign, base_yaw in ((1.0, yaw), (-1.0, yaw + 180.0)):
+            base_values = cls._joint_candidates("m1", base_yaw + BASE_YAW_OFFSET_DEG)
+            if not base_values:
+                continue
+            planar = cls._wrist_chain_candidates(z, -sign * reach, math.atan2(-sign * math.cos(pitch), math.sin(pitch)))
+            if planar is None:
+                continue
+            # The wrist distance is the same for both signs, so is the flag.
+            chains, within_limits = planar
+            for m1 in base_values:
+                for chain in chains:
+                    candidates.append((m1, *chain))
+
+        if not candidates:
+            return None
+        return Pose.from_slots(_CARTESIAN_CHAIN, cls._closest(_CARTESIAN_CHAIN, candidates, current)), within_limits
+
+    @classmethod
+    @PROFILER.timed("ik.cartesian_batch")
+    def solve_cartesian_batch(cls, targets, current: Mapping[str, int] | None = None):
+        """Vectorised ``solve_cartesian`` over an ``(N, 4)`` array of ``x, y, z, pitch`` rows.
+
+        Returns ``(joints, valid, within)``: an ``(N, 4)`` int16 array of
+        m1/m2/m3/m5 values, a mask of rows with a solution inside the servo
+        limits (other rows hold zeros) and a mask of rows that were within
+        reach. Rows pick the same solution ``solve_cartesian`` would.
+        """
+        if np is None:
+            raise RuntimeError("numpy is not installed. Run 'pip install numpy'.")
+        targets = np.asarray(targets, dtype=np.float64).reshape(-1, 4)
+        x, y, z, pitch = targets.T
+        count = len(targets)
+        shoulder_len = cls.links["shoulder"]
+        elbow_len = cls.links["elbow"]
+        wrist_len = cls.links["wrist"]
+
+        reach = np.hypot(x, y)
+        yaw = np.where(reach < 1e-6, cls._current_yaw(current), np.degrees(np.arctan2(y, x)))
+
+        # Candidates in solve_cartesian's order: base sign major, elbow branch minor.
+        joints = np.zeros((4, count, 4), dtype=np.int64)
+        valid = np.zeros((4, count), dtype=bool)
+        within = np.zeros(count, dtype=bool)
+        for sign_index, sign in enumerate((1.0, -1.0)):
+            m1, m1_ok = cls._wrap_joint("m1", yaw + 180.0 * sign_index + BASE_YAW_OFFSET_DEG)
+            phi = np.arctan2(-sign * np.cos(pitch), np.sin(pitch))
+            wx = z - wrist_len * np.cos(phi)
+            wz = -sign * reach - wrist_len * np.sin(phi)
+
+            original_dist = np.hypot(wx, wz)
+            nonzero = original_dist != 0
+            target_dist = np.clip(
+                original_dist, abs(shoulder_len - elbow_len) + 1.0, shoulder_len + elbow_len - 1.0
+            )
+            within |= nonzero & (np.abs(target_dist - original_dist) <= 1e-3)
+            scale = np.divide(target_dist, original_dist, out=np.zeros(count), where=nonzero)
+            wx = wx * scale
+            wz = wz * scale
+
+            cos_elbow = np.clip(
+                (target_dist**2 - shoulder_len**2 - elbow_len**2) / (2 * shoulder_len * elbow_len), -1.0, 1.0
+            )
+            base_angle = np.arccos(cos_elbow)
+            for branch_index, elbow_angle in enumerate((base_angle, -base_angle)):
+                shoulder_angle = np.arctan2(wz, wx) - np.arctan2(
+                    elbow_len * np.sin(elbow_angle), shoulder_len + elbow_len * np.cos(elbow_angle)
+                )
+                forearm_angle = np.arctan2(
+                    wz - shoulder_len * np.sin(shoulder_angle), wx - shoulder_len * np.cos(shoulder_angle)
+                )
+                m2, m2_ok = cls._wrap_joint("m2", np.degrees(shoulder_angle) + cls.offsets["m2"])
+                m3, m3_ok = cls._wrap_joint("m3", np.degrees(forearm_angle - shoulder_angle) + cls.offsets["m3"])
+                m5, m5_ok = cls._wrap_joint("m5", np.degrees(phi - forearm_angle) + cls.offsets["m5"])
+
+                index = 2 * sign_index + branch_index
+                joints[index] = np.column_stack((m1, m2, m3, m5))
+                valid[index] = nonzero & m1_ok & m2_ok & m3_ok & m5_ok
+
+        choice = cls._closest_batch(joints, valid, current)
+        rows = np.arange(count)
+        solved = valid[choice, rows]
+        result = np.where(solved[:, None], joints[choice, rows], 0).astype(np.int16)
+        return result, solved, within & solved
+
+    @staticmethod
+    def _wrap_joint(servo_id: str, degrees):
+        """Array form of ``_joint_candidates``; the servo ranges span less than a turn."""
+        cfg = SERVO_CONFIG[servo_id]
+        value = np.rint(degrees).astype(np.int64)
+        wrapped = (value - cfg.minimum) % 360 + cfg.minimum
+        return wrapped, (wrapped <= cfg.maximum) & (np.abs(wrapped - value) <= 360)
+
+    @staticmethod
+    def _closest_batch(joints, valid, current: Mapping[str, int] | None):
+        # Same rule as _closest: first candidate without a reference, else the
+        # least (slowest, total) weighted travel with ties to the earlier one.
+        if current is None:
+            return np.argmax(valid, axis=0)
+        slowest = np.zeros(valid.shape)
+        total = np.zeros(valid.shape)
+        for column, servo_id in enumerate(_CARTESIAN_CHAIN):
+            reference = current.get(servo_id)
+            if reference is None:
+                continue
+            travel = JOINT_TRAVEL_WEIGHTS[servo_id] * np.abs(joints[:, :, column] - reference)
+            total += travel
+            np.maximum(slowest, travel, out=slowest)
+        slowest[~valid] = np.inf
+        total[slowest > slowest.min(axis=0)] = np.inf
+        return np.argmin(total, axis=0)
+
+    @classmethod
+    def _current_yaw(cls, current: Mapping[str, int] | None) -> float:
+        base = SERVO_CONFIG["m1"].initial if current is None else current.get("m1", SERVO_CONFIG["m1"].initial)
+        return base - BASE_YAW_OFFSET_DEG
+
+    @classmethod
+    def _wrist_chain_candidates(cls, x: float, z: float, phi: float) -> tuple[list[tuple[int, ...]], bool] | None:
         wrist_offset = (
-            ARM_LINKS_MM["wrist"] * math.cos(phi),
-            ARM_LINKS_MM["wrist"] * math.sin(phi),
+            cls.links["wrist"] * math.cos(phi),
+            cls.links["wrist"] * math.sin(phi),
         )
         wx = x - wrist_offset[0]
         wz = z - wrist_offset[1]
@@ -47,8 +282,8 @@ class ArmKinematics:
         original_dist = math.hypot(wx, wz)
         if original_dist == 0:
             return None
-        max_reach = ARM_LINKS_MM["shoulder"] + ARM_LINKS_MM["elbow"] - 1.0
-        min_reach = abs(ARM_LINKS_MM["shoulder"] - ARM_LINKS_MM["elbow"]) + 1.0
+        max_reach = cls.links["shoulder"] + cls.links["elbow"] - 1.0
+        min_reach = abs(cls.links["shoulder"] - cls.links["elbow"]) + 1.0
         target_dist = clamp(original_dist, min_reach, max_reach)
         within_limits = math.isclose(target_dist, original_dist, rel_tol=0.0, abs_tol=1e-3)
         scale = target_dist / original_dist
@@ -56,43 +291,46 @@ class ArmKinematics:
         wz *= scale
 
         cos_elbow = clamp(
-            (target_dist**2 - ARM_LINKS_MM["shoulder"]**2 - ARM_LINKS_MM["elbow"]**2)
-            / (2 * ARM_LINKS_MM["shoulder"] * ARM_LINKS_MM["elbow"]),
+            (target_dist**2 - cls.links["shoulder"]**2 - cls.links["elbow"]**2)
+            / (2 * cls.links["shoulder"] * cls.links["elbow"]),
             -1.0,
             1.0,
         )
-        elbow_angle = math.acos(cos_elbow)
 
-        shoulder_angle = math.atan2(wz, wx) - math.atan2(
-            ARM_LINKS_MM["elbow"] * math.sin(elbow_angle),
-            ARM_LINKS_MM["shoulder"] + ARM_LINKS_MM["elbow"] * math.cos(elbow_angle),
-        )
+        candidates: list[tuple[int, ...]] = []
+        for elbow_angle in cls._elbow_branches(cos_elbow):
+            shoulder_angle = math.atan2(wz, wx) - math.atan2(
+                cls.links["elbow"] * math.sin(elbow_angle),
+                cls.links["shoulder"] + cls.links["elbow"] * math.cos(elbow_angle),
+            )
 
-        upper_vector = (
-            ARM_LINKS_MM["shoulder"] * math.cos(shoulder_angle),
-            ARM_LINKS_MM["shoulder"] * math.sin(shoulder_angle),
-        )
-        forearm_angle = math.atan2(wz - upper_vector[1], wx - upper_vector[0])
-        elbow_deflection = forearm_angle - shoulder_angle
-        wrist_relative = phi - forearm_angle
+            upper_vector = (
+                cls.links["shoulder"] * math.cos(shoulder_angle),
+                cls.links["shoulder"] * math.sin(shoulder_angle),
+            )
+            forearm_angle = math.atan2(wz - upper_vector[1], wx - upper_vector[0])
+            elbow_deflection = forearm_angle - shoulder_angle
+            wrist_relative = phi - forearm_angle
 
-        m2 = int(round(math.degrees(shoulder_angle) + 90))
-        m3 = int(round(math.degrees(elbow_deflection) + 90))
-        m5 = int(round(math.degrees(wrist_relative) + 90))
+            for m2 in cls._joint_candidates("m2", math.degrees(shoulder_angle) + cls.offsets["m2"]):
+                for m3 in cls._joint_candidates("m3", math.degrees(elbow_deflection) + cls.offsets["m3"]):
+                    for m5 in cls._joint_candidates("m5", math.degrees(wrist_relative) + cls.offsets["m5"]):
+                        candidates.append((m2, m3, m5))
 
-        if not (SERVO_CONFIG["m2"].minimum <= m2 <= SERVO_CONFIG["m2"].maximum):
-            return None
-        if not (SERVO_CONFIG["m3"].minimum <= m3 <= SERVO_CONFIG["m3"].maximum):
-            return None
-        if not (SERVO_CONFIG["m5"].minimum <= m5 <= SERVO_CONFIG["m5"].maximum):
+        if not candidates:
             return None
-
-        return {"m2": m2, "m3": m3, "m5": m5}, within_limits
+        return candidates, within_limits
 
     @classmethod
-    def solve_elbow(cls, x: float, z: float) -> tuple[dict[str, int], bool] | None:
-        shoulder_len = ARM_LINKS_MM["shoulder"]
-        elbow_len = ARM_LINKS_MM["elbow"]
+    @PROFILER.timed("ik.elbow")
+    def solve_elbow(
+        cls,
+        x: float,
+        z: float,
+        current: Mapping[str, int] | None = None,
+    ) -> tuple[Pose, bool] | None:
+        shoulder_len = cls.links["shoulder"]
+        elbow_len = cls.links["elbow"]
         dist = math.hypot(x, z)
         if dist == 0:
             return None
@@ -109,38 +347,101 @@ class ArmKinematics:
             -1.0,
             1.0,
         )
-        elbow_angle = math.acos(cos_elbow)
-        shoulder_angle = math.atan2(tz, tx) - math.atan2(
-            elbow_len * math.sin(elbow_angle),
-            shoulder_len + elbow_len * math.cos(elbow_angle),
-        )
 
-        upper_vector = (
-            shoulder_len * math.cos(shoulder_angle),
-            shoulder_len * math.sin(shoulder_angle),
-        )
-        forearm_angle = math.atan2(tz - upper_vector[1], tx - upper_vector[0])
-        elbow_deflection = forearm_angle - shoulder_angle
+        candidates: list[tuple[int, ...]] = []
+        for elbow_angle in cls._elbow_branches(cos_elbow):
+            shoulder_angle = math.atan2(tz, tx) - math.atan2(
+                elbow_len * math.sin(elbow_angle),
+                shoulder_len + elbow_len * math.cos(elbow_angle),
+            )
 
-        m2 = int(round(math.degrees(shoulder_angle) + 90))
-        m3 = int(round(math.degrees(elbow_deflection) + 90))
+            upper_vector = (
+                shoulder_len * math.cos(shoulder_angle),
+                shoulder_len * math.sin(shoulder_angle),
+            )
+            forearm_angle = math.atan2(tz - upper_vector[1], tx - upper_vector[0])
+            elbow_deflection = forearm_angle - shoulder_angle
 
-        if not (SERVO_CONFIG["m2"].minimum <= m2 <= SERVO_CONFIG["m2"].maximum):
-            return None
-        if not (SERVO_CONFIG["m3"].minimum <= m3 <= SERVO_CONFIG["m3"].maximum):
-            return None
+            for m2 in cls._joint_candidates("m2", math.degrees(shoulder_angle) + cls.offsets["m2"]):
+                for m3 in cls._joint_candidates("m3", math.degrees(elbow_deflection) + cls.offsets["m3"]):
+                    candidates.append((m2, m3))
 
-        return {"m2": m2, "m3": m3}, within_limits
+        if not candidates:
+            return None
+        return Pose.from_slots(_ELBOW_CHAIN, cls._closest(_ELBOW_CHAIN, candidates, current)), within_limits
 
     @classmethod
-    def solve_shoulder(cls, x: float, z: float) -> tuple[dict[str, int], bool] | None:
+    @PROFILER.timed("ik.shoulder")
+    def solve_shoulder(cls, x: float, z: float) -> tuple[Pose, bool] | None:
         if math.isclose(x, 0.0, abs_tol=1e-4) and math.isclose(z, 0.0, abs_tol=1e-4):
             return None
-        shoulder_len = ARM_LINKS_MM["shoulder"]
+        shoulder_len = cls.links["shoulder"]
         dist = math.hypot(x, z)
         within_limits = math.isclose(dist, shoulder_len, rel_tol=0.0, abs_tol=5.0)
         angle = math.atan2(z, x)
-        m2 = int(round(math.degrees(angle) + 90))
+        m2 = int(round(math.degrees(angle) + cls.offsets["m2"]))
         if not (SERVO_CONFIG["m2"].minimum <= m2 <= SERVO_CONFIG["m2"].maximum):
             return None
-        return {"m2": m2}, within_limits
+        return Pose.from_slots(("m2",), (m2,)), within_limits
+
+    @classmethod
+    def travel_cost(cls, pose: Mapping[str, int], current: Mapping[str, int]) -> tuple[float, float]:
+        """Weighted (slowest joint, total) travel in degrees from ``current`` to ``pose``.
+
+        The firmware slews all channels in parallel, so the slowest joint
+        dictates move time; the total only breaks ties.
+        """
+        servo_ids = tuple(pose)
+        return cls._travel(servo_ids, tuple(pose[sid] for sid in servo_ids), current)
+
+    @staticmethod
+    def _travel(servo_ids: tuple[str, ...], values: tuple[int, ...], current: Mapping[str, int]) -> tuple[float, float]:
+        slowest = 0.0
+        total = 0.0
+        for servo_id, value in zip(servo_ids, values):
+            reference = current.get(servo_id)
+            if reference is None:
+                continue
+            travel = JOINT_TRAVEL_WEIGHTS[servo_id] * abs(value - reference)
+            total += travel
+            if travel > slowest:
+                slowest = travel
+        return slowest, total
+
+    @classmethod
+    def _closest(
+        cls,
+        servo_ids: tuple[str, ...],
+        candidates: list[tuple[int, ...]],
+        current: Mapping[str, int] | None,
+    ) -> tuple[int, ...]:
+        # Without a reference pose keep the historical elbow branch, which is enumerated first.
+        if current is None or len(candidates) == 1:
+            return candidates[0]
+        return min(candidates, key=lambda values: cls._travel(servo_ids, values, current))
+
+    @staticmethod
+    def _elbow_branches(cos_elbow: float) -> tuple[float, ...]:
+        elbow_angle = math.acos(cos_elbow)
+        if elbow_angle < 1e-9 or elbow_angle > math.pi - 1e-9:
+            return (elbow_angle,)
+        return (elbow_angle, -elbow_angle)
+
+    @staticmethod
+    def _joint_candidates(servo_id: str, degrees: float) -> list[int]:
+        """Integer servo values equivalent to ``degrees`` modulo a full turn that fit the servo limits."""
+        cfg = SERVO_CONFIG[servo_id]
+        value = int(round(degrees))
+        return [
+            candidate
+            for candidate in (value, value - 360, value + 360)
+            if cfg.minimum <= candidate <= cfg.maximum
+        ]
+
+
+try:
+    ArmKinematics.load_calibration()
+except (OSError, ValueError) as exc:
+    # A bad profile must not keep the panel from starting; run on nominal values.
+    ArmKinematics.reset_calibration()
+    ArmKinematics.calibration_error = str(exc)
@@ -1,10 +1,28 @@
 from __future__ import annotations
 
+from typing import Mapping
+
 from PyQt6 import QtCore, QtGui, QtWidgets
 
 from arm_view import ArmView
-from config import BAUD_RATE, DEFAULT_PORT, SERVO_CONFIG, SLIDER_DEBOUNCE_MS
+from config import (
+    BAUD_RATE,
+    DEFAULT_PORT,
+    POSE_BUS_POLL_MS,
+    PROFILE_OUTPUT_DIR,
+    PROFILER_OVERLAY_REFRESH_MS,
+    SERVO_CONFIG,
+    SLIDER_DEBOUNCE_MS,
+    TELEMETRY_OVERLAY_REFRESH_MS,
+    clamp,
+)
+from kinematics import ArmKinematics
+from pose import Pose, servo_mask
+from pose_bus import PoseBus
+from profiler import PROFILER
+from protocol import MAX_MOVE_DURATION_MS
 from serial_manager import LogEmitter, SerialManager
+from servo_lut import ServoLookup
 from widgets import ServoSlider
 
 try:
@@ -23,8 +41,22 @@ class MainWindow(QtWidgets.QMainWindow):
         self.log_emitter.message.connect(self._append_log)
         self.serial_manager = SerialManager(self.log_emitter.message.emit)
         self.slider_timers: dict[str, QtCore.QTimer] = {}
+        # Mirrors the sliders; updated in place so the hot path does not rebuild dicts.
+        self._commanded = Pose.initial()
         self._syncing_from_canvas = False
-
+        self.profiler_timer = QtCore.QTimer(self)
+        self.profiler_timer.setInterval(PROFILER_OVERLAY_REFRESH_MS)
+        self.profiler_timer.timeout.connect(self._refresh_profiler)
+        self.pose_bus: PoseBus | None = None
+        self._pose_bus_seq = 0
+        self.pose_bus_timer = QtCore.QTimer(self)
+        self.pose_bus_timer.setInterval(POSE_BUS_POLL_MS)
+        self.pose_bus_timer.timeout.connect(self._poll_pose_bus)
+        self.telemetry_timer = QtCore.QTimer(self)
+        self.telemetry_timer.setInterval(TELEMETRY_OVERLAY_REFRESH_MS)
+        self.telemetry_timer.timeout.connect(self._refresh_actual_pose)
+
+        self._build_menu()
         central = QtWidgets.QWidget()
         self.setCentralWidget(central)
         main_layout = QtWidgets.QVBoxLayout(central)
@@ -40,6 +72,31 @@ class MainWindow(QtWidgets.QMainWindow):
         main_layout.addWidget(self._build_log_panel(), stretch=1)
 
         self.arm_view.set_pose(self._current_servo_values())
+        self._load_servo_lookup()
+
+    def _build_menu(self) -> None:
+        tools_menu = self.menuBar().addMenu("&Tools")
+
+        self.profiler_overlay_action = QtGui.QAction("Profiler Overlay", self)
+        self.profiler_overlay_action.setCheckable(True)
+        self.profiler_overlay_action.toggled.connect(self._toggle_profiler_overlay)
+        tools_menu.addAction(self.profiler_overlay_action)
+
+        self.profile_capture_action = QtGui.QAction("Record cProfile/tracemalloc Snapshot", self)
+        self.profile_capture_action.setCheckable(True)
+        self.profile_capture_action.toggled.connect(self._toggle_profile_capture)
+        tools_menu.addAction(self.profile_capture_action)
+
+        tools_menu.addSeparator()
+        self.pose_bus_action = QtGui.QAction("Shared-Memory Pose Bus", self)
+        self.pose_bus_action.setCheckable(True)
+        self.pose_bus_action.toggled.connect(self._toggle_pose_bus)
+        tools_menu.addAction(self.pose_bus_action)
+
+        self.telemetry_action = QtGui.QAction("Live Position Telemetry", self)
+        self.telemetry_action.setCheckable(True)
+        self.telemetry_action.toggled.connect(self._toggle_telemetry)
+        tools_menu.addAction(self.telemetry_action)
 
     def _build_connection_bar(self) -> QtWidgets.QHBoxLayout:
         layout = QtWidgets.QHBoxLayout()
@@ -57,6 +114,11 @@ class MainWindow(QtWidgets.QMainWindow):
         layout.addWidget(QtWidgets.QLabel("Baud"))
         layout.addWidget(self.baud_edit)
 
+        self.flow_control_check = QtWidgets.QCheckBox("Ack flow control")
+        self.flow_control_check.setChecked(True)
+        self.flow_control_check.setToolTip("Wait for firmware acknowledgements so commands never overflow its buffer")
+        layout.addWidget(self.flow_control_check)
+
         self.connect_btn = QtWidgets.QPushButton("Connect")
         self.connect_btn.clicked.connect(self.toggle_connection)
         layout.addWidget(self.connect_btn)
@@ -96,6 +158,15 @@ class MainWindow(QtWidgets.QMainWindow):
         self.reset_btn.clicked.connect(self.reset_positions)
         layout.addWidget(self.reset_btn)
 
+        self.move_time_spin = QtWidgets.QSpinBox()
+        self.move_time_spin.setRange(0, MAX_MOVE_DURATION_MS)
+        self.move_time_spin.setSingleStep(100)
+        self.move_time_spin.setSuffix(" ms")
+        self.move_time_spin.setSpecialValueText("Step rate")
+        self.move_time_spin.setToolTip("Duration for Send All / Reset; all servos arrive together")
+        layout.addWidget(QtWidgets.QLabel("Move time"))
+        layout.addWidget(self.move_time_spin)
+
         layout.addStretch()
         return layout
 
@@ -107,6 +178,20 @@ class MainWindow(QtWidgets.QMainWindow):
         self.log_view.document().setDefaultFont(QtGui.QFont("Consolas", 10))
         return self.log_view
 
+    def _load_servo_lookup(self) -> None:
+        if ArmKinematics.calibration_error is not None:
+            self._append_log(
+                f"[Calibration] Ignoring link calibration, using nominal values: {ArmKinematics.calibration_error}\n"
+            )
+        try:
+            lookup = ServoLookup.from_profile()
+        except Exception as exc:
+            self._append_log(f"[Calibration] Ignoring servo curves: {exc}\n")
+            return
+        if not lookup.identity:
+            self.serial_manager.servo_lookup = lookup
+            self._append_log(f"[Calibration] Servo tables loaded for {', '.join(lookup.tables)}\n")
+
     def _refresh_ports(self) -> None:
         ports: list[str] = []
         if list_ports is not None:
@@ -132,25 +217,30 @@ class MainWindow(QtWidgets.QMainWindow):
         baud = int(baud_text or BAUD_RATE)
 
         try:
-            self.serial_manager.connect(port, baud)
+            self.serial_manager.connect(port, baud, flow_control=self.flow_control_check.isChecked())
         except Exception as exc:  # pragma: no cover - UI feedback only
             self._error(f"Failed to connect: {exc}")
             return
 
         self.status_label.setText(f"Connected to {port}")
         self.connect_btn.setText("Disconnect")
+        self.flow_control_check.setEnabled(False)
         self._append_log(f"[Serial] Connected to {port} @ {baud}\n")
 
     def _disconnect(self) -> None:
+        self.telemetry_action.setChecked(False)
         self.serial_manager.disconnect()
         self.status_label.setText("Disconnected")
         self.connect_btn.setText("Connect")
+        self.flow_control_check.setEnabled(True)
         self._append_log("[Serial] Disconnected.\n")
 
     def _handle_servo_change(self, servo_id: str, value: int) -> None:
+        self._commanded[servo_id] = value
         self.arm_view.set_servo_value(servo_id, value)
         if not self._syncing_from_canvas:
             self._queue_servo_send(servo_id)
+            self._publish_commanded_pose()
 
     def _queue_servo_send(self, servo_id: str) -> None:
         timer = self.slider_timers.get(servo_id)
@@ -162,35 +252,52 @@ class MainWindow(QtWidgets.QMainWindow):
         timer.start(SLIDER_DEBOUNCE_MS)
 
     def _send_servo_value(self, servo_id: str) -> None:
-        slider = self.servos[servo_id]
-        value = slider.current_value()
-        command = f"{servo_id}:{value}\n"
-        self._transmit(command)
+        self._transmit(self._commanded.select(servo_mask((servo_id,))))
 
     def send_all(self) -> None:
-        payload = ";".join(f"{sid}:{slider.current_value()}" for sid, slider in self.servos.items()) + "\n"
-        self._transmit(payload)
+        self._transmit(self._current_servo_values(), self._move_duration())
 
-    def _send_pose_fragment(self, pose: dict[str, int]) -> None:
-        parts = [f"{sid}:{self.servos[sid].current_value()}" for sid in pose if sid in self.servos]
-        if not parts:
+    def _send_pose_fragment(self, pose: Mapping[str, int], duration_ms: int | None = None) -> None:
+        mask = pose.mask if isinstance(pose, Pose) else servo_mask(sid for sid in pose if sid in self.servos)
+        if not mask:
             return
-        self._transmit(";".join(parts) + "\n")
+        self._transmit(self._commanded.select(mask), duration_ms)
+
+    def move_to(self, pose: Mapping[str, int], duration_ms: int | None = None) -> None:
+        """Command ``pose`` in a single frame; with ``duration_ms`` every servo arrives together."""
+        for servo_id, value in pose.items():
+            if servo_id in self.servos:
+                self.servos[servo_id].set_value(value)
+                self._commanded[servo_id] = self.servos[servo_id].current_value()
+        self.arm_view.set_pose(self._current_servo_values())
+        self._publish_commanded_pose()
+        self._send_pose_fragment(pose, duration_ms)
+
+    def move_to_cartesian(
+        self, x: float, y: float, z: float, pitch: float = 0.0, duration_ms: int | None = None
+    ) -> bool:
+        """Solve a shoulder-frame target in mm (see ``ArmKinematics.solve_cartesian``) and move there."""
+        result = ArmKinematics.solve_cartesian(x, y, z, pitch, current=self._commanded)
+        if result is None or not result[1]:
+            self._append_log(f"[IK] ({x:.1f}, {y:.1f}, {z:.1f}) is out of reach.\n")
+            return False
+        self.move_to(result[0], duration_ms)
+        return True
 
     def reset_positions(self) -> None:
-        for servo_id, cfg in SERVO_CONFIG.items():
-            self.servos[servo_id].set_value(cfg.initial)
-        self.arm_view.set_pose(self._current_servo_values())
-        self.send_all()
+        self.move_to({sid: cfg.initial for sid, cfg in SERVO_CONFIG.items()}, self._move_duration())
 
-    def _transmit(self, payload: str) -> None:
+    def _move_duration(self) -> int | None:
+        return self.move_time_spin.value() or None
+
+    def _transmit(self, pose: Pose, duration_ms: int | None = None) -> None:
         try:
-            self.serial_manager.send(payload)
+            payload = self.serial_manager.send_pose(pose, duration_ms)
             self._append_log(f"-> {payload}")
         except Exception as exc:
             self._append_log(f"[Send failed] {exc}\n")
 
-    def _apply_canvas_pose(self, pose: dict[str, int]) -> None:
+    def _apply_canvas_pose(self, pose: Pose) -> None:
         self._syncing_from_canvas = True
         try:
             for servo_id, value in pose.items():
@@ -198,11 +305,113 @@ class MainWindow(QtWidgets.QMainWindow):
                     self.servos[servo_id].set_value(value, emit=True)
         finally:
             self._syncing_from_canvas = False
+        self._publish_commanded_pose()
         self._send_pose_fragment(pose)
 
-    def _current_servo_values(self) -> dict[str, int]:
-        return {sid: slider.current_value() for sid, slider in self.servos.items()}
+    def _current_servo_values(self) -> Pose:
+        # Live pose shared with callers; copy() it before holding on to it.
+        return self._commanded
+
+    def _toggle_pose_bus(self, enabled: bool) -> None:
+        if not enabled:
+            self.pose_bus_timer.stop()
+            if self.pose_bus is not None:
+                self.pose_bus.close()
+                self.pose_bus = None
+                self._append_log("[Pose bus] Closed.\n")
+            return
+        try:
+            try:
+                self.pose_bus = PoseBus(create=True)
+            except FileExistsError:
+                self.pose_bus = PoseBus(create=False)
+        except Exception as exc:
+            self._error(f"Failed to open pose bus: {exc}")
+            self.pose_bus_action.setChecked(False)
+            return
+        self._pose_bus_seq = self.pose_bus.targets.head()
+        self._publish_commanded_pose()
+        self.pose_bus_timer.start()
+        self._append_log(f"[Pose bus] Listening on shared memory '{self.pose_bus.name}'.\n")
+
+    def _poll_pose_bus(self) -> None:
+        if self.pose_bus is None:
+            return
+        result = self.pose_bus.read_target(self._pose_bus_seq)
+        if result is None:
+            return
+        # Only the newest target matters; intermediate ones are skipped.
+        self._pose_bus_seq, target = result
+        for servo_id, value in target.items():
+            target[servo_id] = int(clamp(value, SERVO_CONFIG[servo_id].minimum, SERVO_CONFIG[servo_id].maximum))
+        if target:
+            self._apply_canvas_pose(target)
+
+    def _publish_commanded_pose(self) -> None:
+        if self.pose_bus is not None:
+            self.pose_bus.publish_commanded(self._current_servo_values())
+
+    def _toggle_telemetry(self, enabled: bool) -> None:
+        if not enabled:
+            self.telemetry_timer.stop()
+            self.arm_view.set_actual_pose(None)
+            try:
+                self.serial_manager.stop_telemetry()
+            except Exception as exc:
+                self._append_log(f"[Telemetry] Stop failed: {exc}\n")
+            return
+        conn = self.serial_manager.serial_conn
+        if not conn or not conn.is_open:
+            self._error("Connect to the arm before enabling telemetry.")
+            self.telemetry_action.setChecked(False)
+            return
+        try:
+            self.serial_manager.start_telemetry()
+        except Exception as exc:
+            self._error(f"Failed to start telemetry: {exc}")
+            self.telemetry_action.setChecked(False)
+            return
+        self.telemetry_timer.start()
+        self._append_log("[Telemetry] Streaming positions.\n")
+
+    def _refresh_actual_pose(self) -> None:
+        recorder = self.serial_manager.telemetry
+        sample = recorder.latest() if recorder is not None else None
+        if sample is None:
+            return
+        pose = sample.pose
+        if self.serial_manager.servo_lookup is not None:
+            # Telemetry reports written angles; show them in commanded ones.
+            pose = self.serial_manager.servo_lookup.invert(pose)
+        self.arm_view.set_actual_pose(pose)
+
+    def _toggle_profiler_overlay(self, enabled: bool) -> None:
+        PROFILER.set_enabled(enabled)
+        self.arm_view.set_profiler_overlay(enabled)
+        if enabled:
+            self.profiler_timer.start()
+        else:
+            self.profiler_timer.stop()
+
+    def _refresh_profiler(self) -> None:
+        PROFILER.sample()
+        self.arm_view.update()
+
+    def _toggle_profile_capture(self, enabled: bool) -> None:
+        if enabled:
+            PROFILER.start_capture()
+            self._append_log("[Profiler] Capture started.\n")
+            return
+        if not PROFILER.capturing:
+            return
+        try:
+            profile_path, memory_path = PROFILER.stop_capture(PROFILE_OUTPUT_DIR)
+        except Exception as exc:
+            self._append_log(f"[Profiler] Failed to write capture: {exc}\n")
+            return
+        self._append_log(f"[Profiler] Wrote {profile_path} and {memory_path}\n")
 
+    @PROFILER.timed("log")
     def _append_log(self, text: str) -> None:
         self.log_view.moveCursor(QtGui.QTextCursor.MoveOperation.End)
         self.log_view.insertPlainText(text)
@@ -212,5 +421,7 @@ class MainWindow(QtWidgets.QMainWindow):
         QtWidgets.QMessageBox.critical(self, "Braccio Controller", message)
 
     def closeEvent(self, event: QtGui.QCloseEvent) -> None:  # noqa: N802 (Qt override)
+        self.profile_capture_action.setChecked(False)
+        self.pose_bus_action.setChecked(False)
         self._disconnect()
         super().closeEvent(event)
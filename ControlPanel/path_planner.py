@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+
+from config import SERVO_CONFIG, SERVO_STEP_DEGREES, SERVO_STEP_INTERVAL_MS
+from kinematics import ArmKinematics
+from pose import SERVO_IDS, Pose
+
+
+@dataclass(frozen=True)
+class PlanResult:
+    order: list[int]
+    input_ms: float
+    optimized_ms: float
+
+    @property
+    def saved_ms(self) -> float:
+        return self.input_ms - self.optimized_ms
+
+
+def joint_array(poses: Iterable[Mapping[str, int]], start: Mapping[str, int] | None = None) -> np.ndarray:
+    """Stack poses into an ``(N, 6)`` array; servos a pose omits hold their start value."""
+    hold = [SERVO_CONFIG[sid].initial if start is None else start.get(sid, SERVO_CONFIG[sid].initial) for sid in SERVO_IDS]
+    rows = [[pose.get(sid, hold[col]) for col, sid in enumerate(SERVO_IDS)] for pose in poses]
+    return np.array(rows, dtype=np.int32).reshape(-1, len(SERVO_IDS))
+
+
+def poses_from_cartesian(
+    targets: Iterable[tuple[float, float]],
+    phi: float = -math.pi / 2,
+    start: Mapping[str, int] | None = None,
+) -> list[Pose]:
+    """Solve planar ``(x, z)`` targets, preferring branches close to ``start``."""
+    poses = []
+    for index, (x, z) in enumerate(targets):
+        result = ArmKinematics.solve_inverse(x, z, phi, current=start)
+        if result is None or not result[1]:
+            raise ValueError(f"Waypoint {index} at ({x:.1f}, {z:.1f}) is out of reach.")
+        poses.append(result[0])
+    return poses
+
+
+def travel_time_matrix(joints: np.ndarray) -> np.ndarray:
+    """Pairwise move time in ms between rows of ``joints``.
+
+    The firmware steps every channel at once, so a move lasts as long as the
+    joint with the largest change.
+    """
+    count = len(joints)
+    degrees = np.zeros((count, count), dtype=np.int32)
+    for column in joints.T:
+        np.maximum(degrees, np.abs(column[:, None] - column[None, :]), out=degrees)
+    steps = np.ceil(degrees / SERVO_STEP_DEGREES)
+    return (steps * SERVO_STEP_INTERVAL_MS).astype(np.float32)
+
+
+def plan_order(
+    waypoints: Sequence[Mapping[str, int]],
+    start: Mapping[str, int] | None = None,
+    time_limit_s: float = 0.8,
+) -> PlanResult:
+    """Order ``waypoints`` to minimise total travel time from ``start``.
+
+    Builds a nearest-neighbour tour and improves it with 2-opt until no move
+    helps or ``time_limit_s`` runs out. Without ``start`` the tour may begin
+    at any waypoint.
+    """
+    count = len(waypoints)
+    if count == 0:
+        return PlanResult([], 0.0, 0.0)
+
+    deadline = time.perf_counter() + time_limit_s
+    joints = joint_array(waypoints, start)
+    if start is not None:
+        joints = np.vstack([joint_array([start], start), joints])
+    costs = travel_time_matrix(joints)
+
+    # Node 0 is the start and the last node a free end; a missing start is a
+    # second free node, so both ends of the path can float.
+    size = count + 2
+    matrix = np.zeros((size, size), dtype=np.float32)
+    if start is not None:
+        matrix[: count + 1, : count + 1] = costs
+    else:
+        matrix[1 : count + 1, 1 : count + 1] = costs
+
+    route = _nearest_neighbour(matrix, count)
+    route = _two_opt(matrix, route, deadline)
+
+    input_route = np.arange(size)
+    return PlanResult(
+        order=[int(node) - 1 for node in route[1:-1]],
+        input_ms=_route_cost(matrix, input_route),
+        optimized_ms=_route_cost(matrix, route),
+    )
+
+
+def _route_cost(matrix: np.ndarray, route: np.ndarray) -> float:
+    return float(matrix[route[:-1], route[1:]].sum(dtype=np.float64))
+
+
+def _nearest_neighbour(matrix: np.ndarray, count: int) -> np.ndarray:
+    visited = np.zeros(len(matrix), dtype=bool)
+    visited[0] = visited[-1] = True
+    route = np.empty(len(matrix), dtype=np.intp)
+    route[0] = 0
+    route[-1] = len(matrix) - 1
+    current = 0
+    for position in range(1, count + 1):
+        row = np.where(visited, np.inf, matrix[current])
+        current = int(np.argmin(row))
+        visited[current] = True
+        route[position] = current
+    return route
+
+
+def _two_opt(matrix: np.ndarray, route: np.ndarray, deadline: float) -> np.ndarray:
+    last = len(route) - 1
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(last - 2):
+            if time.perf_counter() >= deadline:
+                break
+            a, b = route[i], route[i + 1]
+            c = route[i + 2 : last]
+            d = route[i + 3 : last + 1]
+            delta = matrix[a, c] + matrix[b, d] - matrix[a, b] - matrix[c, d]
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-3:
+                j = i + 2 + best
+                route[i + 1 : j + 1] = route[i + 1 : j + 1][::-1].copy()
+                improved = True
+    return route
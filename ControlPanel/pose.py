@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from collections.abc import ItemsView, Mapping, ValuesView
+from typing import Iterable, Iterator
+
+from config import SERVO_CONFIG
+from protocol import encode_pose
+
+SERVO_IDS = tuple(SERVO_CONFIG)
+SERVO_INDEX = {servo_id: index for index, servo_id in enumerate(SERVO_IDS)}
+FULL_MASK = (1 << len(SERVO_IDS)) - 1
+# Slot indices for every mask, so loops only visit the servos a pose holds.
+_MASK_SLOTS = tuple(
+    tuple(index for index in range(len(SERVO_IDS)) if mask >> index & 1) for mask in range(FULL_MASK + 1)
+)
+_MASK_SIZES = tuple(len(slots) for slots in _MASK_SLOTS)
+# Pre-rendered "mN:value" tokens for every in-range value; encoding is a join.
+_TOKENS = tuple(
+    {value: f"{servo_id}:{value}" for value in range(cfg.minimum, cfg.maximum + 1)}
+    for servo_id, cfg in SERVO_CONFIG.items()
+)
+
+
+def servo_mask(servo_ids: Iterable[str]) -> int:
+    mask = 0
+    for servo_id in servo_ids:
+        mask |= 1 << SERVO_INDEX[servo_id]
+    return mask
+
+
+class Pose(Mapping):
+    """Servo values in a fixed ``SERVO_CONFIG`` slot layout.
+
+    Bit ``i`` of ``mask`` is set when slot ``i`` holds a value, so partial
+    poses (solver results, single-servo fragments) share the type with full
+    ones. Reads behave like a ``dict[str, int]`` over the set servos. The
+    wire encoding is cached until the pose is modified.
+    """
+
+    __slots__ = ("_slots", "mask", "_encoded")
+
+    def __init__(self, values: Mapping[str, int] | None = None):
+        self._slots = [0] * len(SERVO_IDS)
+        self.mask = 0
+        self._encoded: str | None = None
+        if values is not None:
+            self.update(values)
+
+    @classmethod
+    def from_slots(cls, servo_ids: tuple[str, ...], values: Iterable[int]) -> Pose:
+        pose = cls()
+        slots = pose._slots
+        mask = 0
+        for servo_id, value in zip(servo_ids, values):
+            index = SERVO_INDEX[servo_id]
+            slots[index] = value
+            mask |= 1 << index
+        pose.mask = mask
+        return pose
+
+    @classmethod
+    def initial(cls) -> Pose:
+        return cls.from_slots(SERVO_IDS, (cfg.initial for cfg in SERVO_CONFIG.values()))
+
+    def __getitem__(self, servo_id: str) -> int:
+        index = SERVO_INDEX[servo_id]
+        if not self.mask >> index & 1:
+            raise KeyError(servo_id)
+        return self._slots[index]
+
+    def __setitem__(self, servo_id: str, value: int) -> None:
+        index = SERVO_INDEX[servo_id]
+        self._slots[index] = value
+        self.mask |= 1 << index
+        self._encoded = None
+
+    def __contains__(self, servo_id: object) -> bool:
+        index = SERVO_INDEX.get(servo_id)  # type: ignore[arg-type]
+        return index is not None and bool(self.mask >> index & 1)
+
+    def __iter__(self) -> Iterator[str]:
+        return (SERVO_IDS[index] for index in _MASK_SLOTS[self.mask])
+
+    def __len__(self) -> int:
+        return _MASK_SIZES[self.mask]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Pose):
+            if self.mask != other.mask:
+                return False
+            return all(self._slots[index] == other._slots[index] for index in _MASK_SLOTS[self.mask])
+        if isinstance(other, Mapping):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Pose({dict(self.items())!r})"
+
+    def get(self, servo_id: str, default: int | None = None) -> int | None:  # type: ignore[override]
+        index = SERVO_INDEX.get(servo_id)
+        if index is None or not self.mask >> index & 1:
+            return default
+        return self._slots[index]
+
+    def items(self) -> _PoseItems:
+        return _PoseItems(self)
+
+    def values(self) -> _PoseValues:
+        return _PoseValues(self)
+
+    def copy(self) -> Pose:
+        pose = Pose.__new__(Pose)
+        pose._slots = self._slots[:]
+        pose.mask = self.mask
+        pose._encoded = self._encoded
+        return pose
+
+    def select(self, mask: int) -> Pose:
+        """Copy holding only the servos in ``mask`` that this pose has."""
+        pose = Pose.__new__(Pose)
+        pose._slots = self._slots[:]
+        pose.mask = self.mask & mask
+        pose._encoded = self._encoded if pose.mask == self.mask else None
+        return pose
+
+    def update(self, other: Mapping[str, int]) -> int:
+        """Overwrite with the servos ``other`` has; returns the mask of slots that changed."""
+        values = self._slots
+        changed = 0
+        if isinstance(other, Pose):
+            missing = ~self.mask
+            other_values = other._slots
+            for index in _MASK_SLOTS[other.mask]:
+                value = other_values[index]
+                if values[index] != value or missing >> index & 1:
+                    values[index] = value
+                    changed |= 1 << index
+        else:
+            for servo_id, value in other.items():
+                index = SERVO_INDEX[servo_id]
+                bit = 1 << index
+                if values[index] != value or not self.mask & bit:
+                    values[index] = value
+                    changed |= bit
+        if changed:
+            self.mask |= changed
+            self._encoded = None
+        return changed
+
+    def changed_mask(self, other: Pose) -> int:
+        """Slots set in ``other`` whose value differs from (or is missing in) this pose."""
+        values = self._slots
+        other_values = other._slots
+        missing = ~self.mask
+        changed = 0
+        for index in _MASK_SLOTS[other.mask]:
+            if values[index] != other_values[index] or missing >> index & 1:
+                changed |= 1 << index
+        return changed
+
+    def diff(self, other: Pose) -> Pose:
+        """The part of ``other`` that differs from this pose."""
+        return other.select(self.changed_mask(other))
+
+    def encode(self, duration_ms: int | None = None) -> str:
+        if duration_ms:
+            return encode_pose(self, duration_ms)
+        if self._encoded is None:
+            if not self.mask:
+                raise ValueError("Cannot encode an empty pose.")
+            values = self._slots
+            try:
+                self._encoded = ";".join([_TOKENS[index][values[index]] for index in _MASK_SLOTS[self.mask]]) + "\n"
+            except KeyError:
+                # Out-of-range values are still sent; the firmware clamps them.
+                self._encoded = encode_pose(self)
+        return self._encoded
+
+
+class _PoseItems(ItemsView):
+    # Walk the slots directly instead of a key lookup per servo.
+    def __iter__(self) -> Iterator[tuple[str, int]]:
+        pose = self._mapping
+        slots = pose._slots
+        return ((SERVO_IDS[index], slots[index]) for index in _MASK_SLOTS[pose.mask])
+
+
+class _PoseValues(ValuesView):
+    def __iter__(self) -> Iterator[int]:
+        pose = self._mapping
+        slots = pose._slots
+        return (slots[index] for index in _MASK_SLOTS[pose.mask])
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import math
+import time
+import tracemalloc
+
+from config import SERVO_CONFIG
+from kinematics import ArmKinematics
+from pose import Pose
+from protocol import encode_pose
+
+
+def drag_solutions(events: int) -> list[Pose]:
+    """IK results for an effector dragged along a smooth sweep of reachable targets."""
+    solutions = []
+    current = Pose.initial()
+    for index in range(events):
+        phase = index / 40
+        m2 = 90 + 50 * math.sin(phase)
+        m3 = 90 + 60 * math.sin(phase * 0.7)
+        m5 = 90 + 40 * math.cos(phase * 1.3)
+        points = ArmKinematics.forward(m2, m3, m5)
+        (wx, wz), (x, z) = points[-2], points[-1]
+        result = ArmKinematics.solve_inverse(x, z, math.atan2(z - wz, x - wx), current=current)
+        if result is not None:
+            current.update(result[0])
+            solutions.append(result[0])
+    return solutions
+
+
+def _dict_hop(solution: dict[str, int], sliders: dict[str, int]) -> str:
+    # The drag-to-serial path before Pose: slider writes, a full snapshot for
+    # the view and pose bus, then a fragment dict that is encoded.
+    for servo_id, value in solution.items():
+        sliders[servo_id] = value
+    snapshot = {servo_id: value for servo_id, value in sliders.items()}
+    fragment = {servo_id: snapshot[servo_id] for servo_id in solution}
+    return encode_pose(fragment)
+
+
+def _pose_hop(solution: Pose, commanded: Pose) -> str:
+    commanded.update(solution)
+    return commanded.select(solution.mask).encode()
+
+
+def _time_hops(hop, solutions, state, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for solution in solutions:
+            hop(solution, state)
+        best = min(best, time.perf_counter() - start)
+    return best / len(solutions) * 1e6
+
+
+def _peak_bytes(hop, solutions, state) -> float:
+    """Mean peak of memory allocated while one hop runs."""
+    total = 0
+    tracemalloc.start()
+    try:
+        for solution in solutions:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            hop(solution, state)
+            total += tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return total / len(solutions)
+
+
+def run_benchmark(events: int = 5000, repeats: int = 7) -> dict[str, float]:
+    """Compare one drag event's trip to a serial payload with dicts and with ``Pose``.
+
+    Timings are the best of ``repeats`` runs in microseconds per event;
+    memory is the mean transient peak per event in bytes.
+    """
+    solutions = drag_solutions(events)
+    dict_solutions = [dict(solution.items()) for solution in solutions]
+    sliders = {servo_id: cfg.initial for servo_id, cfg in SERVO_CONFIG.items()}
+    commanded = Pose.initial()
+
+    for dict_solution, solution in zip(dict_solutions, solutions):
+        if _dict_hop(dict_solution, sliders) != _pose_hop(solution, commanded):
+            raise RuntimeError("Dict and Pose paths encoded different payloads.")
+
+    return {
+        "events": len(solutions),
+        "dict_us": _time_hops(_dict_hop, dict_solutions, sliders, repeats),
+        "pose_us": _time_hops(_pose_hop, solutions, commanded, repeats),
+        "dict_peak_bytes": _peak_bytes(_dict_hop, dict_solutions, sliders),
+        "pose_peak_bytes": _peak_bytes(_pose_hop, solutions, commanded),
+    }
+
+
+if __name__ == "__main__":
+    result = run_benchmark()
+    print(f"{result['events']} drag events")
+    print(f"  dict: {result['dict_us']:.2f} us/event, {result['dict_peak_bytes']:.0f} B peak")
+    print(f"  Pose: {result['pose_us']:.2f} us/event, {result['pose_peak_bytes']:.0f} B peak")
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import inspect
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Mapping
+
+from config import POSE_BUS_CAPACITY, POSE_BUS_NAME
+from pose import SERVO_IDS, Pose
+
+UNSET = -1
+
+_MAGIC = b"BPB1"
+_HEADER = struct.Struct("<4sHHI")
+_HEADER_SIZE = 16
+_HEAD = struct.Struct("<Q")
+_SLOT = struct.Struct(f"<Q{len(SERVO_IDS)}h")
+_SLOT_STRIDE = (_SLOT.size + 7) // 8 * 8
+# Python 3.13+ can attach without registering with the resource tracker.
+_CAN_SKIP_TRACKING = "track" in inspect.signature(shared_memory.SharedMemory).parameters
+# Segments created by this process; its tracker entry belongs to the owner.
+_CREATED_HERE: set[str] = set()
+
+
+class _PoseRing:
+    """Single-writer ring of poses inside a shared buffer.
+
+    Each slot carries the sequence number it was written with. The writer
+    zeroes it before touching the values, so a reader that sees the same
+    sequence before and after copying the values knows they were not torn.
+    """
+
+    def __init__(self, buf: memoryview, offset: int, capacity: int):
+        self._buf = buf
+        self._offset = offset
+        self._slots = offset + _HEAD.size
+        self.capacity = capacity
+
+    @staticmethod
+    def size(capacity: int) -> int:
+        return _HEAD.size + capacity * _SLOT_STRIDE
+
+    def head(self) -> int:
+        return _HEAD.unpack_from(self._buf, self._offset)[0]
+
+    def write(self, pose: Mapping[str, int]) -> int:
+        seq = self.head() + 1
+        slot = self._slots + (seq - 1) % self.capacity * _SLOT_STRIDE
+        _HEAD.pack_into(self._buf, slot, 0)
+        _SLOT.pack_into(self._buf, slot, 0, *(pose.get(sid, UNSET) for sid in SERVO_IDS))
+        _HEAD.pack_into(self._buf, slot, seq)
+        _HEAD.pack_into(self._buf, self._offset, seq)
+        return seq
+
+    def read(self, seq: int) -> Pose | None:
+        slot = self._slots + (seq - 1) % self.capacity * _SLOT_STRIDE
+        before, *values = _SLOT.unpack_from(self._buf, slot)
+        after = _HEAD.unpack_from(self._buf, slot)[0]
+        if before != seq or after != seq:
+            return None
+        pose = Pose()
+        pose._slots = values
+        pose.mask = sum(1 << index for index, value in enumerate(values) if value != UNSET)
+        return pose
+
+    def latest(self, after: int = 0) -> tuple[int, Pose] | None:
+        while True:
+            seq = self.head()
+            if seq <= after:
+                return None
+            pose = self.read(seq)
+            if pose is not None:
+                return seq, pose
+
+    def since(self, after: int = 0) -> list[tuple[int, Pose]]:
+        """Every pose newer than ``after`` that has not been overwritten yet."""
+        head = self.head()
+        first = max(after + 1, head - self.capacity + 1, 1)
+        poses = []
+        for seq in range(first, head + 1):
+            pose = self.read(seq)
+            if pose is not None:
+                poses.append((seq, pose))
+        return poses
+
+
+class PoseBus:
+    """Shared-memory exchange of joint poses with external processes.
+
+    ``targets`` carries poses written by an outside producer (e.g. a vision
+    process) for the panel to follow; ``commanded`` carries the pose the
+    panel is currently commanding. Poses are stored as fixed int16 slots in
+    ``SERVO_CONFIG`` order, with ``UNSET`` for servos a pose leaves alone.
+    """
+
+    def __init__(self, name: str = POSE_BUS_NAME, create: bool = False, capacity: int = POSE_BUS_CAPACITY):
+        ring_size = _PoseRing.size(capacity)
+        size = _HEADER_SIZE + 2 * ring_size
+        self.owner = create
+        if create or not _CAN_SKIP_TRACKING:
+            self._shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+        buf = self._shm.buf
+        if create:
+            _CREATED_HERE.add(self._shm.name)
+            buf[:size] = bytes(size)
+            _HEADER.pack_into(buf, 0, _MAGIC, 1, len(SERVO_IDS), capacity)
+        else:
+            _untrack(self._shm)
+            magic, _version, servo_count, capacity = _HEADER.unpack_from(buf, 0)
+            if magic != _MAGIC or servo_count != len(SERVO_IDS):
+                self._shm.close()
+                raise ValueError(f"Shared memory '{name}' is not a compatible pose bus.")
+            ring_size = _PoseRing.size(capacity)
+        self.targets = _PoseRing(buf, _HEADER_SIZE, capacity)
+        self.commanded = _PoseRing(buf, _HEADER_SIZE + ring_size, capacity)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def publish_target(self, pose: Mapping[str, int]) -> int:
+        return self.targets.write(pose)
+
+    def publish_commanded(self, pose: Mapping[str, int]) -> int:
+        return self.commanded.write(pose)
+
+    def read_target(self, after: int = 0) -> tuple[int, Pose] | None:
+        return self.targets.latest(after)
+
+    def read_commanded(self, after: int = 0) -> tuple[int, Pose] | None:
+        return self.commanded.latest(after)
+
+    def wait_target(
+        self, after: int = 0, timeout: float | None = None, poll_interval: float = 0.0002
+    ) -> tuple[int, Pose] | None:
+        """Spin until a target newer than ``after`` arrives or ``timeout`` expires."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            result = self.targets.latest(after)
+            if result is not None:
+                return result
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def close(self) -> None:
+        # Drop our views first; SharedMemory.close() refuses while they exist.
+        self.targets = self.commanded = None  # type: ignore[assignment]
+        self._shm.close()
+        if self.owner:
+            _CREATED_HERE.discard(self._shm.name)
+            self._shm.unlink()
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    # Before Python 3.13 attaching registers the segment with this process's
+    # resource tracker, which would unlink it from under the owner on exit.
+    # The tracker keeps one entry per name, so when the owner lives in this
+    # process the entry is its own and must stay for its unlink().
+    if _CAN_SKIP_TRACKING or os.name != "posix" or shm.name in _CREATED_HERE:
+        return
+    from multiprocessing import resource_tracker
+
+    # SharedMemory registers the name with its leading slash.
+    resource_tracker.unregister("/" + shm.name.lstrip("/"), "shared_memory")
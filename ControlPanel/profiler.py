@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import cProfile
+import functools
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+
+@dataclass
+class TimerStat:
+    count: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+    rate: float = 0.0
+    mean_ms: float = 0.0
+    _sampled_count: int = 0
+    _sampled_total_ns: int = 0
+
+    def add(self, elapsed_ns: int) -> None:
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def clear(self) -> None:
+        self.count = self.total_ns = self.max_ns = 0
+        self._sampled_count = self._sampled_total_ns = 0
+        self.rate = self.mean_ms = 0.0
+
+
+class Profiler:
+    """Cheap hot-path timers plus on-demand cProfile/tracemalloc capture.
+
+    Timers are always registered but only record while ``enabled`` is set, so
+    the disabled cost is a single attribute check per call.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.stats: dict[str, TimerStat] = {}
+        self._last_sample = time.perf_counter()
+        self._cprofile: cProfile.Profile | None = None
+
+    def stat(self, name: str) -> TimerStat:
+        stat = self.stats.get(name)
+        if stat is None:
+            stat = self.stats[name] = TimerStat()
+        return stat
+
+    def timed(self, name: str) -> Callable[[F], F]:
+        stat = self.stat(name)
+
+        def decorator(func: F) -> F:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    stat.add(time.perf_counter_ns() - start)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorator
+
+    def count(self, name: str) -> None:
+        if self.enabled:
+            self.stat(name).add(0)
+
+    def sample(self) -> None:
+        """Refresh per-second rates and mean durations since the previous sample."""
+        now = time.perf_counter()
+        elapsed = now - self._last_sample
+        self._last_sample = now
+        if elapsed <= 0:
+            return
+        for stat in self.stats.values():
+            calls = stat.count - stat._sampled_count
+            spent = stat.total_ns - stat._sampled_total_ns
+            stat.rate = calls / elapsed
+            stat.mean_ms = spent / calls / 1e6 if calls else 0.0
+            stat._sampled_count = stat.count
+            stat._sampled_total_ns = stat.total_ns
+
+    def reset(self) -> None:
+        # Clear in place: decorated functions hold on to their TimerStat.
+        for stat in self.stats.values():
+            stat.clear()
+        self._last_sample = time.perf_counter()
+
+    def set_enabled(self, enabled: bool) -> None:
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    def summary_lines(self) -> list[str]:
+        lines = []
+        for name, stat in self.stats.items():
+            if stat.count == 0:
+                continue
+            if stat.total_ns:
+                lines.append(f"{name}: {stat.rate:6.1f}/s  {stat.mean_ms:6.2f} ms  (max {stat.max_ns / 1e6:.1f})")
+            else:
+                lines.append(f"{name}: {stat.rate:6.1f}/s")
+        return lines
+
+    @property
+    def capturing(self) -> bool:
+        return self._cprofile is not None
+
+    def start_capture(self) -> None:
+        if self._cprofile is not None:
+            return
+        tracemalloc.start()
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+
+    def stop_capture(self, directory: Path) -> tuple[Path, Path]:
+        """Stop capturing and write ``.prof`` and ``.tracemalloc`` files into ``directory``."""
+        if self._cprofile is None:
+            raise RuntimeError("No profile capture is running.")
+        profile, self._cprofile = self._cprofile, None
+        profile.disable()
+        try:
+            snapshot = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+
+        # The capture is over even if writing fails below.
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = time.strftime("braccio-%Y%m%d-%H%M%S")
+        profile_path = directory / f"{stem}.prof"
+        memory_path = directory / f"{stem}.tracemalloc"
+        profile.dump_stats(profile_path)
+        snapshot.dump(str(memory_path))
+        return profile_path, memory_path
+
+
+PROFILER = Profiler()
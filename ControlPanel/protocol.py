@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import math
+from typing import Mapping
+
+from config import SERIAL_LINE_LIMIT
+
+FIRMWARE_ACK = "ok"
+FIRMWARE_NACK = "err"
+FIRMWARE_READY_PREFIX = "Braccio ready"
+
+# Optional per-line token; every servo in the line reaches its target together
+# after this many milliseconds. Mirrors MAX_MOVE_DURATION_MS in the firmware.
+MOVE_DURATION_TOKEN = "t"
+MAX_MOVE_DURATION_MS = 60000
+
+# "tel:<ms>" makes the firmware report its positions every <ms> milliseconds
+# as "@<millis>,<moving mask>,<p1>,...,<p6>"; "tel:0" stops the stream.
+TELEMETRY_TOKEN = "tel"
+TELEMETRY_PREFIX = "@"
+MIN_TELEMETRY_INTERVAL_MS = 20
+MAX_TELEMETRY_INTERVAL_MS = 60000
+
+
+def encode_pose(pose: Mapping[str, int], duration_ms: int | None = None) -> str:
+    """Encode servo targets as one firmware line, e.g. ``m1:90;m2:45;t:800\\n``."""
+    parts = [f"{servo_id}:{int(value)}" for servo_id, value in pose.items()]
+    if not parts:
+        raise ValueError("Cannot encode an empty pose.")
+    if duration_ms:
+        if not 0 < duration_ms <= MAX_MOVE_DURATION_MS:
+            raise ValueError(f"Move duration must be between 1 and {MAX_MOVE_DURATION_MS} ms.")
+        parts.append(f"{MOVE_DURATION_TOKEN}:{int(duration_ms)}")
+    line = ";".join(parts)
+    if len(line) > SERIAL_LINE_LIMIT:
+        raise ValueError(f"Command of {len(line)} characters exceeds the firmware line limit.")
+    return line + "\n"
+
+
+def encode_telemetry_request(interval_ms: int) -> str:
+    if interval_ms and not MIN_TELEMETRY_INTERVAL_MS <= interval_ms <= MAX_TELEMETRY_INTERVAL_MS:
+        raise ValueError(
+            f"Telemetry interval must be 0 or between {MIN_TELEMETRY_INTERVAL_MS} and {MAX_TELEMETRY_INTERVAL_MS} ms."
+        )
+    return f"{TELEMETRY_TOKEN}:{int(interval_ms)}\n"
+
+
+def parse_telemetry(line: str) -> tuple[int, int, list[int]] | None:
+    """Split a telemetry line into ``(device_ms, moving_mask, positions)``; ``None`` if malformed."""
+    fields = line.strip()[len(TELEMETRY_PREFIX) :].split(",")
+    try:
+        values = [int(field) for field in fields]
+    except ValueError:
+        return None
+    if len(values) < 3:
+        return None
+    return values[0], values[1], values[2:]
+
+
+def duration_for_speed(start: Mapping[str, int], target: Mapping[str, int], degrees_per_s: float) -> int:
+    """Duration in ms that moves the joint with the largest change at ``degrees_per_s``."""
+    if degrees_per_s <= 0:
+        raise ValueError("Speed must be positive.")
+    travel = max((abs(value - start[sid]) for sid, value in target.items() if sid in start), default=0)
+    return min(MAX_MOVE_DURATION_MS, max(1, math.ceil(travel * 1000 / degrees_per_s)))
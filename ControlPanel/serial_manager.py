@@ -1,52 +1,244 @@
 from __future__ import annotations
 
 import threading
-from typing import Callable
+import time
+from collections import deque
+from typing import Callable, Mapping
 
 from PyQt6 import QtCore
 
+from config import (
+    FLOW_CONTROL_ACK_TIMEOUT_MS,
+    FLOW_CONTROL_MAX_FRAMES,
+    SERIAL_LINE_LIMIT,
+    SERIAL_RX_BUFFER_BYTES,
+    TELEMETRY_INTERVAL_MS,
+)
+from profiler import PROFILER
+from pose import SERVO_IDS, Pose
+from protocol import (
+    FIRMWARE_ACK,
+    FIRMWARE_NACK,
+    FIRMWARE_READY_PREFIX,
+    TELEMETRY_PREFIX,
+    encode_pose,
+    encode_telemetry_request,
+    parse_telemetry,
+)
+from servo_lut import ServoLookup
+from telemetry import TelemetryRecorder
+
 try:
     import serial
     import serial.tools.list_ports
 except ImportError:  # pragma: no cover - optional dependency
     serial = None  # type: ignore
 
+_TELEMETRY_PREFIX = TELEMETRY_PREFIX.encode("ascii")
+
 
 class LogEmitter(QtCore.QObject):
     message = QtCore.pyqtSignal(str)
 
 
 class SerialManager:
-    """Thin wrapper around pySerial with a background reader."""
+    """Thin wrapper around pySerial with a background reader.
+
+    With flow control enabled, frames are queued and a writer thread only
+    releases them while the unacknowledged bytes and frames fit inside the
+    firmware's receive buffer. Each ``ok``/``err`` line from the firmware
+    returns the credit of the oldest in-flight frame.
+
+    Telemetry lines (``@...``) are recorded into ``telemetry`` on the reader
+    thread and never reach ``on_message``.
+    """
 
     def __init__(self, on_message: Callable[[str], None]):
         self.on_message = on_message
         self.serial_conn: serial.Serial | None = None  # type: ignore[assignment]
         self.reader_thread: threading.Thread | None = None
+        self.writer_thread: threading.Thread | None = None
         self.reader_stop = threading.Event()
+        self.flow_control = False
+        self.window_bytes = SERIAL_RX_BUFFER_BYTES
+        self.window_frames = FLOW_CONTROL_MAX_FRAMES
+        self.ack_timeout = FLOW_CONTROL_ACK_TIMEOUT_MS / 1000.0
+        self._credit = threading.Condition()
+        self._pending: deque[bytes] = deque()
+        self._in_flight: deque[tuple[int, float]] = deque()
+        self._in_flight_bytes = 0
+        self.frames_acked = 0
+        self.frames_rejected = 0
+        self.servo_lookup: ServoLookup | None = None
+        self.telemetry: TelemetryRecorder | None = None
+        self._telemetry_interval = 0
+        # Without flow control the reader thread may also write (telemetry restarts).
+        self._write_lock = threading.Lock()
 
-    def connect(self, port: str, baud: int) -> None:
+    def connect(self, port: str, baud: int, flow_control: bool = False) -> None:
         if serial is None:
             raise RuntimeError("pyserial is not installed. Run 'pip install pyserial'.")
         if self.serial_conn and self.serial_conn.is_open:
             self.disconnect()
-        self.serial_conn = serial.Serial(port, baudrate=baud, timeout=0.1)
+        self.attach(serial.Serial(port, baudrate=baud, timeout=0.1), flow_control)
+
+    def attach(self, conn, flow_control: bool = False) -> None:
+        """Start the reader (and writer) threads on an already open port-like object."""
+        self.serial_conn = conn
+        self.flow_control = flow_control
+        with self._credit:
+            self._pending.clear()
+            self._in_flight.clear()
+            self._in_flight_bytes = 0
+        self.frames_acked = 0
+        self.frames_rejected = 0
         self.reader_stop.clear()
         self.reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
         self.reader_thread.start()
+        if flow_control:
+            self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self.writer_thread.start()
 
     def disconnect(self) -> None:
+        if self.serial_conn and self.serial_conn.is_open:
+            if self._telemetry_interval:
+                try:
+                    self.stop_telemetry()
+                except Exception as exc:
+                    self.on_message(f"[Serial] Could not stop telemetry: {exc}\n")
+            # Let queued frames (e.g. the telemetry stop) reach the board before the writer exits.
+            if self.flow_control:
+                self.wait_until_drained(self.ack_timeout)
+        self._telemetry_interval = 0
         self.reader_stop.set()
+        with self._credit:
+            self._credit.notify_all()
+        if self.writer_thread:
+            self.writer_thread.join(timeout=0.5)
+            self.writer_thread = None
         if self.reader_thread:
             self.reader_thread.join(timeout=0.5)
         if self.serial_conn and self.serial_conn.is_open:
             self.serial_conn.close()
         self.serial_conn = None
 
+    @PROFILER.timed("serial.send")
     def send(self, payload: str) -> None:
         if not self.serial_conn or not self.serial_conn.is_open:
             raise RuntimeError("Serial port is not connected.")
-        self.serial_conn.write(payload.encode("ascii"))
+        data = payload.encode("ascii")
+        if not self.flow_control:
+            with self._write_lock:
+                self.serial_conn.write(data)
+            return
+        line_length = len(data.rstrip(b"\r\n"))
+        if line_length > SERIAL_LINE_LIMIT:
+            raise ValueError(
+                f"Line of {line_length} characters exceeds the firmware line limit of {SERIAL_LINE_LIMIT}."
+            )
+        if len(data) > self.window_bytes:
+            raise ValueError(
+                f"Frame of {len(data)} bytes does not fit the {self.window_bytes}-byte flow control window."
+            )
+        with self._credit:
+            self._pending.append(data)
+            self._credit.notify_all()
+
+    def send_pose(self, pose: Mapping[str, int], duration_ms: int | None = None) -> str:
+        """Send ``pose`` as one frame, optionally as a timed move; returns the payload.
+
+        Per-servo calibration tables, when loaded, are applied here so the
+        rest of the panel keeps working in commanded angles.
+        """
+        if self.servo_lookup is not None:
+            pose = self.servo_lookup.apply(pose)
+        payload = pose.encode(duration_ms) if isinstance(pose, Pose) else encode_pose(pose, duration_ms)
+        self.send(payload)
+        return payload
+
+    def start_telemetry(self, interval_ms: int = TELEMETRY_INTERVAL_MS) -> TelemetryRecorder:
+        """Ask the firmware to stream its positions every ``interval_ms`` ms."""
+        if self.telemetry is None:
+            self.telemetry = TelemetryRecorder()
+        self.send(encode_telemetry_request(interval_ms))
+        self._telemetry_interval = interval_ms
+        return self.telemetry
+
+    def stop_telemetry(self) -> None:
+        self._telemetry_interval = 0
+        if self.serial_conn and self.serial_conn.is_open:
+            self.send(encode_telemetry_request(0))
+
+    def wait_until_settled(self, timeout: float | None = None) -> bool:
+        """Block until telemetry shows every servo at rest after the frames sent so far.
+
+        Samples only prove the firmware saw the last frame once its ack has
+        come back, so without flow control an early sample can still match.
+        """
+        if self.telemetry is None:
+            raise RuntimeError("Telemetry is not running.")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if self.flow_control and not self.wait_until_drained(timeout):
+            return False
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+        return self.telemetry.wait_until_settled(timeout=remaining) is not None
+
+    def pending_frames(self) -> int:
+        with self._credit:
+            return len(self._pending) + len(self._in_flight)
+
+    def wait_until_drained(self, timeout: float | None = None) -> bool:
+        """Block until every queued frame has been acknowledged."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._credit:
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._credit.wait(remaining)
+        return True
+
+    def _has_credit(self, size: int) -> bool:
+        return len(self._in_flight) < self.window_frames and self._in_flight_bytes + size <= self.window_bytes
+
+    def _release_credit(self, reset: bool = False) -> None:
+        with self._credit:
+            if reset:
+                self._in_flight.clear()
+                self._in_flight_bytes = 0
+            elif self._in_flight:
+                size, _ = self._in_flight.popleft()
+                self._in_flight_bytes -= size
+            self._credit.notify_all()
+
+    def _writer_loop(self) -> None:
+        assert self.serial_conn is not None
+        while not self.reader_stop.is_set():
+            with self._credit:
+                while not self.reader_stop.is_set() and not (
+                    self._pending and self._has_credit(len(self._pending[0]))
+                ):
+                    timeout = None
+                    if self._in_flight:
+                        timeout = self._in_flight[0][1] + self.ack_timeout - time.monotonic()
+                        if timeout <= 0:
+                            self.on_message(
+                                f"[Serial] No ack for {len(self._in_flight)} frame(s); resetting credit window.\n"
+                            )
+                            self._in_flight.clear()
+                            self._in_flight_bytes = 0
+                            continue
+                    self._credit.wait(timeout)
+                if self.reader_stop.is_set():
+                    break
+                frame = self._pending.popleft()
+                self._in_flight.append((len(frame), time.monotonic()))
+                self._in_flight_bytes += len(frame)
+            try:
+                self.serial_conn.write(frame)
+            except Exception as exc:
+                self.on_message(f"[Serial error] {exc}\n")
+                break
 
     def _reader_loop(self) -> None:
         assert self.serial_conn is not None
@@ -57,9 +249,39 @@ class SerialManager:
                 self.on_message(f"[Serial error] {exc}\n")
                 break
             if line:
-                try:
-                    decoded = line.decode("utf-8", errors="replace")
-                except Exception:
-                    decoded = repr(line)
-                self.on_message(decoded)
+                self._handle_line(line)
         self.on_message("[Serial] Reader stopped.\n")
+
+    @PROFILER.timed("serial.rx")
+    def _handle_line(self, line: bytes) -> None:
+        if line.startswith(_TELEMETRY_PREFIX):
+            self._record_telemetry(line)
+            return
+        try:
+            decoded = line.decode("utf-8", errors="replace")
+        except Exception:
+            decoded = repr(line)
+        status = decoded.strip()
+        if status == FIRMWARE_ACK:
+            self.frames_acked += 1
+            self._release_credit()
+            return
+        if status == FIRMWARE_NACK:
+            self.frames_rejected += 1
+            self._release_credit()
+            self.on_message("[Serial] Firmware dropped an oversized frame.\n")
+            return
+        if status.startswith(FIRMWARE_READY_PREFIX):
+            # The board reset, so anything still in flight was lost and the
+            # telemetry stream has to be requested again.
+            self._release_credit(reset=True)
+            if self._telemetry_interval:
+                self.send(encode_telemetry_request(self._telemetry_interval))
+        self.on_message(decoded)
+
+    def _record_telemetry(self, line: bytes) -> None:
+        sample = parse_telemetry(line.decode("ascii", errors="replace"))
+        if self.telemetry is None or sample is None or len(sample[2]) != len(SERVO_IDS):
+            return
+        device_ms, moving, positions = sample
+        self.telemetry.append(device_ms, moving, positions)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Mapping, Sequence
+
+from config import CALIBRATION_PROFILE, SERVO_CONFIG
+from pose import SERVO_IDS, SERVO_INDEX, Pose
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore
+
+
+def compile_curve(servo_id: str, points: Sequence[Sequence[float]]) -> list[int]:
+    """Dense table ``output = table[commanded - minimum]`` over the servo's range.
+
+    ``points`` are ``(commanded, output)`` pairs; values between them are
+    interpolated linearly and values past either end keep the end offset.
+    """
+    cfg = SERVO_CONFIG[servo_id]
+    curve = sorted((float(commanded), float(output)) for commanded, output in points)
+    if not curve:
+        raise ValueError(f"Calibration curve for {servo_id} has no points.")
+    table = []
+    segment = 0
+    for commanded in range(cfg.minimum, cfg.maximum + 1):
+        if commanded <= curve[0][0]:
+            output = commanded + curve[0][1] - curve[0][0]
+        elif commanded >= curve[-1][0]:
+            output = commanded + curve[-1][1] - curve[-1][0]
+        else:
+            while curve[segment + 1][0] < commanded:
+                segment += 1
+            (x0, y0), (x1, y1) = curve[segment], curve[segment + 1]
+            output = y0 + (y1 - y0) * (commanded - x0) / (x1 - x0)
+        table.append(int(min(max(round(output), cfg.minimum), cfg.maximum)))
+    return table
+
+
+def invert_table(table: Sequence[int], minimum: int) -> list[int]:
+    """Commanded value whose output is closest to each output over the same range.
+
+    Ties and flat stretches resolve to the lowest commanded value.
+    """
+    inverse: list[int | None] = [None] * len(table)
+    for offset, output in enumerate(table):
+        if inverse[output - minimum] is None:
+            inverse[output - minimum] = minimum + offset
+    hits = [index for index, commanded in enumerate(inverse) if commanded is not None]
+    nearest = 0
+    for index in range(len(inverse)):
+        while nearest + 1 < len(hits) and abs(hits[nearest + 1] - index) < abs(hits[nearest] - index):
+            nearest += 1
+        inverse[index] = inverse[hits[nearest]]
+    return inverse  # type: ignore[return-value]
+
+
+class ServoLookup:
+    """Per-servo commanded-to-written angle tables applied on the send path.
+
+    Curves from the calibration profile are compiled once into integer
+    tables, so correcting a value costs a single index.
+    """
+
+    def __init__(self, curves: Mapping[str, Sequence[Sequence[float]]] | None = None):
+        self.tables: dict[str, list[int]] = {
+            servo_id: compile_curve(servo_id, points) for servo_id, points in (curves or {}).items()
+        }
+        self._active = [
+            (SERVO_INDEX[servo_id], servo_id, SERVO_CONFIG[servo_id].minimum, SERVO_CONFIG[servo_id].maximum, table)
+            for servo_id, table in self.tables.items()
+        ]
+        self._inverse = [
+            (index, servo_id, minimum, maximum, invert_table(table, minimum))
+            for index, servo_id, minimum, maximum, table in self._active
+        ]
+        self._matrix = None
+
+    @classmethod
+    def from_profile(cls, path: str | os.PathLike | None = None) -> ServoLookup:
+        """Load ``servo_curves`` from the calibration profile; identity when absent."""
+        profile = Path(path or os.environ.get("BRACCIO_CALIBRATION", CALIBRATION_PROFILE))
+        if not profile.is_file():
+            return cls()
+        data = json.loads(profile.read_text(encoding="utf-8"))
+        curves = data.get("servo_curves", {})
+        unknown = set(curves) - set(SERVO_CONFIG)
+        if unknown:
+            raise ValueError(f"Unknown servo(s) in calibration curves: {', '.join(sorted(unknown))}")
+        return cls(curves)
+
+    @property
+    def identity(self) -> bool:
+        return not self.tables
+
+    def apply(self, pose: Mapping[str, int]) -> Pose:
+        """Correct the servos that have a curve; the others pass through unchanged.
+
+        Only slots whose value changes are written, so a pose the tables leave
+        alone keeps its cached encoding.
+        """
+        corrected = pose.copy() if isinstance(pose, Pose) else Pose(pose)
+        for index, servo_id, minimum, maximum, table in self._active:
+            if corrected.mask >> index & 1:
+                value = corrected._slots[index]
+                output = table[min(max(value, minimum), maximum) - minimum]
+                if output != value:
+                    corrected[servo_id] = output
+        return corrected
+
+    def invert(self, pose: Mapping[str, int]) -> Pose:
+        """Map written angles (e.g. telemetry) back to the commanded angles that produce them."""
+        restored = pose.copy() if isinstance(pose, Pose) else Pose(pose)
+        for index, servo_id, minimum, maximum, inverse in self._inverse:
+            if restored.mask >> index & 1:
+                value = restored._slots[index]
+                output = inverse[min(max(value, minimum), maximum) - minimum]
+                if output != value:
+                    restored[servo_id] = output
+        return restored
+
+    def apply_array(self, trajectory):
+        """Correct an ``(N, 6)`` integer array of poses in ``SERVO_CONFIG`` order.
+
+        Matches ``apply``: columns without a curve are returned unchanged.
+        """
+        if np is None:
+            raise RuntimeError("numpy is not installed. Run 'pip install numpy'.")
+        matrix, minimums, maximums, curved = self._compiled_matrix()
+        trajectory = np.asarray(trajectory)
+        indices = np.clip(trajectory, minimums, maximums) - minimums
+        corrected = matrix[np.arange(len(SERVO_IDS)), indices]
+        return np.where(curved, corrected, trajectory).astype(trajectory.dtype, copy=False)
+
+    def _compiled_matrix(self):
+        if self._matrix is None:
+            minimums = np.array([SERVO_CONFIG[sid].minimum for sid in SERVO_IDS])
+            maximums = np.array([SERVO_CONFIG[sid].maximum for sid in SERVO_IDS])
+            width = int((maximums - minimums).max()) + 1
+            # Rows for servos without a curve are never selected; padding past a
+            # servo's range is never indexed.
+            matrix = minimums[:, None] + np.arange(width)[None, :]
+            curved = np.zeros(len(SERVO_IDS), dtype=bool)
+            for index, _servo_id, _minimum, _maximum, table in self._active:
+                matrix[index, : len(table)] = table
+                curved[index] = True
+            self._matrix = (matrix.astype(np.int16), minimums, maximums, curved)
+        return self._matrix
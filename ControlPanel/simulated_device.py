@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+
+from config import (
+    SERIAL_LINE_LIMIT,
+    SERVO_CONFIG,
+    SERVO_STEP_DEGREES,
+    SERVO_STEP_INTERVAL_MS,
+    clamp,
+)
+from protocol import (
+    FIRMWARE_ACK,
+    FIRMWARE_NACK,
+    MAX_MOVE_DURATION_MS,
+    MAX_TELEMETRY_INTERVAL_MS,
+    MIN_TELEMETRY_INTERVAL_MS,
+    MOVE_DURATION_TOKEN,
+    TELEMETRY_PREFIX,
+    TELEMETRY_TOKEN,
+)
+from serial_manager import SerialManager
+
+
+class SimulatedBraccio:
+    """Port-like stand-in for the firmware, used to exercise SerialManager without hardware.
+
+    Incoming bytes land in a fixed-size receive buffer exactly like the AVR
+    hardware ring, which keeps one of its slots free: anything that does not
+    fit is lost. A background thread
+    plays the part of ``loop()``, parsing lines with the same rules as
+    ``main.cpp`` and answering each one with ``ok`` or ``err``. Servos slew
+    towards their targets at the firmware step rate, or interpolate over a
+    ``t:<ms>`` timed move, and ``tel:<ms>`` starts the same position
+    telemetry stream.
+    """
+
+    def __init__(self, rx_ring_bytes: int = 64, line_cost_s: float = 0.0005):
+        self.is_open = True
+        self.rx_buffer_bytes = rx_ring_bytes - 1
+        self.line_cost_s = line_cost_s
+        self.positions = {sid: cfg.initial for sid, cfg in SERVO_CONFIG.items()}
+        self.targets = dict(self.positions)
+        self.telemetry_interval_ms = 0
+        # servo_id -> (start angle, start ms, duration ms) of a running timed move.
+        self._timed_moves: dict[str, tuple[int, int, int]] = {}
+        self._clock_start = time.monotonic()
+        self.bytes_dropped = 0
+        self.frames_processed = 0
+        self.frames_rejected = 0
+        self.commands_applied = 0
+        self._rx = bytearray()
+        self._rx_lock = threading.Lock()
+        self._rx_ready = threading.Event()
+        self._tx: queue.Queue[bytes] = queue.Queue()
+        self._line = bytearray()
+        self._discarding = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._firmware_loop, daemon=True)
+        self._thread.start()
+
+    def write(self, data: bytes) -> int:
+        with self._rx_lock:
+            room = self.rx_buffer_bytes - len(self._rx)
+            accepted = data[: max(room, 0)]
+            self._rx.extend(accepted)
+            self.bytes_dropped += len(data) - len(accepted)
+        self._rx_ready.set()
+        return len(data)
+
+    def readline(self) -> bytes:
+        try:
+            return self._tx.get(timeout=0.1)
+        except queue.Empty:
+            return b""
+
+    def close(self) -> None:
+        self.is_open = False
+        self._stop.set()
+        self._rx_ready.set()
+        self._thread.join(timeout=0.5)
+
+    def is_idle(self) -> bool:
+        with self._rx_lock:
+            return not self._rx and not self._line
+
+    def millis(self) -> int:
+        return int((time.monotonic() - self._clock_start) * 1000)
+
+    def _firmware_loop(self) -> None:
+        last_step = last_telemetry = 0.0
+        while not self._stop.is_set():
+            self._rx_ready.wait(0.005)
+            with self._rx_lock:
+                incoming = bytes(self._rx)
+                self._rx.clear()
+                self._rx_ready.clear()
+            for byte in incoming:
+                self._feed(byte)
+
+            now = time.monotonic()
+            if now - last_step >= SERVO_STEP_INTERVAL_MS / 1000.0:
+                last_step = now
+                self._step_servos(self.millis())
+            if self.telemetry_interval_ms and now - last_telemetry >= self.telemetry_interval_ms / 1000.0:
+                last_telemetry = now
+                self._send_telemetry(self.millis())
+
+    def _step_servos(self, now_ms: int) -> None:
+        for servo_id, target in self.targets.items():
+            timed = self._timed_moves.get(servo_id)
+            if timed is not None:
+                start_angle, start_ms, duration_ms = timed
+                elapsed = now_ms - start_ms
+                if elapsed < duration_ms:
+                    # C integer division truncates toward zero, as in the firmware.
+                    self.positions[servo_id] = start_angle + int((target - start_angle) * elapsed / duration_ms)
+                else:
+                    self.positions[servo_id] = target
+                    del self._timed_moves[servo_id]
+                continue
+            diff = target - self.positions[servo_id]
+            if diff:
+                self.positions[servo_id] += max(-SERVO_STEP_DEGREES, min(SERVO_STEP_DEGREES, diff))
+
+    def _send_telemetry(self, device_ms: int) -> None:
+        moving = 0
+        for index, servo_id in enumerate(SERVO_CONFIG):
+            if self.positions[servo_id] != self.targets[servo_id] or servo_id in self._timed_moves:
+                moving |= 1 << index
+        values = ",".join(str(value) for value in self.positions.values())
+        self._tx.put(f"{TELEMETRY_PREFIX}{device_ms},{moving},{values}\r\n".encode("ascii"))
+
+    def _feed(self, byte: int) -> None:
+        if byte == ord("\r"):
+            return
+        if byte == ord("\n"):
+            if self._discarding:
+                self._discarding = False
+                self.frames_rejected += 1
+                self._tx.put(f"{FIRMWARE_NACK}\r\n".encode("ascii"))
+            else:
+                self._handle_line(self._line.decode("ascii", errors="replace"))
+                self.frames_processed += 1
+                self._tx.put(f"{FIRMWARE_ACK}\r\n".encode("ascii"))
+            self._line.clear()
+            time.sleep(self.line_cost_s)
+            return
+        if self._discarding:
+            return
+        self._line.append(byte)
+        if len(self._line) > SERIAL_LINE_LIMIT:
+            self._line.clear()
+            self._discarding = True
+
+    def _handle_line(self, line: str) -> None:
+        duration_ms = 0
+        touched = []
+        for token in line.split(";"):
+            servo_id, sep, value = token.strip().partition(":")
+            servo_id = servo_id.strip().lower()
+            value = value.strip()
+            if not sep or not value.isdigit():
+                continue
+            if servo_id == MOVE_DURATION_TOKEN:
+                duration_ms = min(int(value), MAX_MOVE_DURATION_MS)
+                continue
+            if servo_id == TELEMETRY_TOKEN:
+                interval = int(value)
+                self.telemetry_interval_ms = interval and int(
+                    clamp(interval, MIN_TELEMETRY_INTERVAL_MS, MAX_TELEMETRY_INTERVAL_MS)
+                )
+                continue
+            if servo_id not in SERVO_CONFIG:
+                continue
+            cfg = SERVO_CONFIG[servo_id]
+            self.targets[servo_id] = int(clamp(int(value), cfg.minimum, cfg.maximum))
+            self._timed_moves.pop(servo_id, None)
+            touched.append(servo_id)
+            self.commands_applied += 1
+        if duration_ms:
+            now_ms = self.millis()
+            for servo_id in touched:
+                self._timed_moves[servo_id] = (self.positions[servo_id], now_ms, duration_ms)
+
+
+def run_saturation(frames: int = 2000, flow_control: bool = True) -> dict[str, float]:
+    """Push ``frames`` two-servo commands as fast as possible and count what the device applied.
+
+    With flow control on, any lost command raises ``RuntimeError``.
+    """
+    device = SimulatedBraccio()
+    messages: list[str] = []
+    manager = SerialManager(messages.append)
+    manager.attach(device, flow_control=flow_control)
+
+    start = time.perf_counter()
+    for index in range(frames):
+        manager.send_pose({"m1": index % 270, "m2": 15 + index % 150})
+    drained = True
+    if flow_control:
+        drained = manager.wait_until_drained(timeout=60.0)
+    else:
+        while not device.is_idle():
+            time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    manager.disconnect()
+
+    sent = frames * 2
+    lost = sent - device.commands_applied
+    if flow_control and (lost or not drained):
+        raise RuntimeError(f"Flow control lost {lost} of {sent} commands ({device.bytes_dropped} bytes dropped).")
+    return {
+        "commands_sent": sent,
+        "commands_applied": device.commands_applied,
+        "commands_lost": lost,
+        "bytes_dropped": device.bytes_dropped,
+        "frames_per_s": frames / elapsed if elapsed else float("inf"),
+    }
+
+
+if __name__ == "__main__":
+    for enabled in (False, True):
+        result = run_saturation(flow_control=enabled)
+        label = "flow control" if enabled else "no flow control"
+        print(
+            f"{label:>16}: {result['commands_applied']}/{result['commands_sent']} applied, "
+            f"{result['commands_lost']} lost, {result['frames_per_s']:.0f} frames/s"
+        )
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Mapping, Sequence
+
+from config import TELEMETRY_BUFFER_SAMPLES
+from pose import SERVO_IDS, SERVO_INDEX, Pose
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore
+
+
+@dataclass(frozen=True)
+class TelemetrySample:
+    seq: int
+    received: float
+    device_ms: int
+    moving: int
+    pose: Pose
+
+    @property
+    def settled(self) -> bool:
+        return not self.moving
+
+
+class TelemetryRecorder:
+    """Preallocated ring of the positions the firmware reports.
+
+    ``append`` runs on the serial reader thread and only copies into fixed
+    arrays; readers get copies under the same lock. ``seq`` counts every
+    sample ever recorded, so callers can wait for samples newer than a point
+    they observed.
+    """
+
+    def __init__(self, capacity: int = TELEMETRY_BUFFER_SAMPLES):
+        if np is None:
+            raise RuntimeError("numpy is not installed. Run 'pip install numpy'.")
+        self.capacity = capacity
+        self.received = np.zeros(capacity, dtype=np.float64)
+        self.device_ms = np.zeros(capacity, dtype=np.int64)
+        self.moving = np.zeros(capacity, dtype=np.uint8)
+        self.positions = np.zeros((capacity, len(SERVO_IDS)), dtype=np.int16)
+        self.seq = 0
+        self._changed = threading.Condition()
+
+    def append(self, device_ms: int, moving: int, positions: Sequence[int], received: float | None = None) -> int:
+        with self._changed:
+            slot = self.seq % self.capacity
+            self.received[slot] = time.monotonic() if received is None else received
+            self.device_ms[slot] = device_ms
+            self.moving[slot] = moving
+            self.positions[slot] = positions
+            self.seq += 1
+            self._changed.notify_all()
+            return self.seq
+
+    def clear(self) -> None:
+        with self._changed:
+            self.seq = 0
+
+    def latest(self) -> TelemetrySample | None:
+        with self._changed:
+            return self._sample(self.seq) if self.seq else None
+
+    def snapshot(self, seconds: float | None = None) -> dict[str, np.ndarray]:
+        """Copies of the buffered samples, oldest first; ``seconds`` keeps only the most recent ones."""
+        with self._changed:
+            count = min(self.seq, self.capacity)
+            order = np.arange(self.seq - count, self.seq) % self.capacity
+            data = {
+                "received": self.received[order],
+                "device_ms": self.device_ms[order],
+                "moving": self.moving[order],
+                "positions": self.positions[order],
+            }
+        if seconds is not None and count:
+            keep = data["received"] >= data["received"][-1] - seconds
+            data = {key: value[keep] for key, value in data.items()}
+        return data
+
+    def wait_until_settled(self, after: int | None = None, timeout: float | None = None) -> TelemetrySample | None:
+        """Wait for a sample newer than ``after`` (default: now) in which no servo is moving."""
+        return self._wait(lambda slot: not self.moving[slot], after, timeout)
+
+    def wait_for_pose(
+        self,
+        pose: Mapping[str, int],
+        tolerance: int = 0,
+        after: int | None = None,
+        timeout: float | None = None,
+    ) -> TelemetrySample | None:
+        """Wait for a sample newer than ``after`` with every servo in ``pose`` within ``tolerance``.
+
+        Positions are the angles the firmware writes, i.e. after any servo
+        calibration tables.
+        """
+        columns = [SERVO_INDEX[servo_id] for servo_id in pose]
+        target = np.array([pose[servo_id] for servo_id in pose])
+        return self._wait(
+            lambda slot: bool(np.all(np.abs(self.positions[slot, columns] - target) <= tolerance)), after, timeout
+        )
+
+    def _wait(self, matches, after: int | None, timeout: float | None) -> TelemetrySample | None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            checked = self.seq if after is None else after
+            while True:
+                # Samples the ring already overwrote can no longer be checked.
+                for seq in range(max(checked, self.seq - self.capacity) + 1, self.seq + 1):
+                    if matches((seq - 1) % self.capacity):
+                        return self._sample(seq)
+                checked = self.seq
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._changed.wait(remaining)
+
+    def _sample(self, seq: int) -> TelemetrySample:
+        slot = (seq - 1) % self.capacity
+        return TelemetrySample(
+            seq=seq,
+            received=float(self.received[slot]),
+            device_ms=int(self.device_ms[slot]),
+            moving=int(self.moving[slot]),
+            pose=Pose.from_slots(SERVO_IDS, self.positions[slot].tolist()),
+        )